@@ -1,18 +1,90 @@
 #!/usr/bin/env python3
 
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
 from os import environ
 
+import orjson
 import psycopg2
+import psycopg2.pool
 from dotenv import load_dotenv
 from flask import Flask, jsonify, render_template, request, send_from_directory
+from flask.json.provider import JSONProvider
 
 load_dotenv()
 
+if environ.get('DRZEWO_GEVENT'):
+    # Let psycopg2 yield to the gevent hub while waiting on the database.
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+
+class OrjsonProvider(JSONProvider):
+    """Serialize jsonify() responses with orjson, keeping Flask's sorted keys."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 DEFAULT_LIMIT = 60
 MAX_LIMIT = 150
 MIN_RADIUS_M = 1.0
 MAX_RADIUS_M = 5000.0
+# Size to gunicorn threads per worker; each worker process owns its own pool and keeps
+# up to this many connections open, so none are closed and re-prepared between requests.
+DB_POOL_MAX_CONN = int(environ.get('DRZEWO_DB_POOL_MAX_CONN', '10'))
+# How long a request waits for a free pooled connection before answering 503.
+DB_POOL_TIMEOUT_S = float(environ.get('DRZEWO_DB_POOL_TIMEOUT', '5'))
+# Tree data only changes on reload, so repeated /nearest lookups are served from
+# a per-worker cache; the TTL bounds how long a reload takes to show up, and a TTL
+# of 0 or less turns the cache off.
+NEAREST_CACHE_SIZE = 4096
+NEAREST_CACHE_TTL_S = int(environ.get('DRZEWO_NEAREST_CACHE_TTL', '300'))
+# Five decimal places is about a metre, well inside GPS noise. Lookups run at the rounded
+# point, so distances and the max_distance_m cutoff can be off by up to about half a metre.
+NEAREST_CACHE_PRECISION = 5
+_db_pool = None
+_db_pool_lock = threading.Lock()
+_configured_connections = weakref.WeakSet()
+
+# json_agg keeps column order, so columns are listed alphabetically to match the sorted
+# keys jsonify() emits everywhere else.
+NEAREST_SELECT = """
+    SELECT address, botanical_name, common_name, dbh_trunk AS dbh,
+    geog <-> ST_MakePoint($1, $2)::geography AS distance,
+    ST_Y(ST_GeometryN(geom, 1)) AS latitude, ST_X(ST_GeometryN(geom, 1)) AS longitude,
+    objectid, to_jsonb(street_trees)->>'original_common_name' AS original_common_name,
+    tree_position_number AS pos, source, street_trees.species_id, streetname
+    FROM street_trees
+"""
+# Postgres builds the response body itself; ::text keeps psycopg2 from parsing it.
+PREPARED_STATEMENTS = (
+    f"""
+    PREPARE nearest_trees (float8, float8, integer) AS
+    SELECT COALESCE(json_agg(nearest ORDER BY nearest.distance), '[]')::text
+    FROM ({NEAREST_SELECT}
+        ORDER BY distance
+        LIMIT $3
+    ) AS nearest;
+    """,
+    f"""
+    PREPARE nearest_trees_within (float8, float8, float8, integer) AS
+    SELECT COALESCE(json_agg(nearest ORDER BY nearest.distance), '[]')::text
+    FROM ({NEAREST_SELECT}
+        WHERE ST_DWithin(geog, ST_MakePoint($1, $2)::geography, $3)
+        ORDER BY distance
+        LIMIT $4
+    ) AS nearest;
+    """,
+)
 
 
 def db_params():
@@ -25,6 +97,80 @@ def db_params():
         "port": environ.get('DRZEWO_DB_PORT', '5432')
     }
 
+
+class BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """Open connections on demand, keep them for reuse, and wait briefly when all are busy."""
+
+    def __init__(self, maxconn, timeout, **kwargs):
+        super().__init__(1, maxconn, **kwargs)
+        # putconn only keeps a returned connection while fewer than minconn sit idle.
+        self.minconn = self.maxconn
+        self._timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self._timeout):
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+def db_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _db_pool
+    # Created lazily so each forked gunicorn worker opens its own connections.
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = BlockingConnectionPool(
+                    DB_POOL_MAX_CONN, DB_POOL_TIMEOUT_S, **db_params()
+                )
+    return _db_pool
+
+
+def configure_connection(conn):
+    """Set up a pooled connection once: read-only autocommit plus prepared queries."""
+    if conn in _configured_connections:
+        return
+    # The API only reads, so skip the BEGIN/ROLLBACK pair around every query.
+    conn.set_session(readonly=True, autocommit=True)
+    cur = conn.cursor()
+    for statement in PREPARED_STATEMENTS:
+        cur.execute(statement)
+    cur.close()
+    _configured_connections.add(conn)
+
+
+@contextmanager
+def pooled_connection():
+    """Check out a configured connection, dropping it from the pool if it broke."""
+    pool = db_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        configure_connection(conn)
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+@app.errorhandler(psycopg2.pool.PoolError)
+def database_busy(_error):
+    return jsonify({"error": "database is busy, try again shortly"}), 503
+
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -46,90 +192,67 @@ def service_worker():
 def offline():
     return send_from_directory("static", "offline.html")
 
-@app.route('/nearest', methods=['GET'])
-def nearest():
-    lat = request.args.get('lat', type=float)
-    lng = request.args.get('lng', type=float)
-    limit = request.args.get('limit', type=int) or DEFAULT_LIMIT
-
+def _parse_nearest_args(args):
+    """Return validated (lat, lng, limit, max_distance_m) or raise ValueError."""
+    lat = args.get('lat', type=float)
+    lng = args.get('lng', type=float)
     if lat is None or lng is None:
-        return jsonify({"error": "lat and lng query parameters are required"}), 400
-
-    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
-        return jsonify({"error": "lat/lng are out of bounds"}), 400
+        raise ValueError("lat and lng query parameters are required")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat/lng are out of bounds")
 
     # Keep request size bounded for predictable query cost.
-    limit = max(1, min(limit, MAX_LIMIT))
+    limit = max(1, min(args.get('limit', type=int) or DEFAULT_LIMIT, MAX_LIMIT))
 
-    max_distance_m_raw = request.args.get('max_distance_m')
-    max_distance_m = None
-    if max_distance_m_raw is not None:
+    max_distance_m = args.get('max_distance_m')
+    if max_distance_m is not None:
         try:
-            max_distance_m = float(max_distance_m_raw)
+            max_distance_m = max(MIN_RADIUS_M, min(float(max_distance_m), MAX_RADIUS_M))
         except ValueError:
-            return jsonify({"error": "max_distance_m must be a number"}), 400
-        max_distance_m = max(MIN_RADIUS_M, min(max_distance_m, MAX_RADIUS_M))
+            raise ValueError("max_distance_m must be a number") from None
+    return lat, lng, limit, max_distance_m
 
-    conn = psycopg2.connect(**db_params())
-    try:
+
+@lru_cache(maxsize=NEAREST_CACHE_SIZE)
+def _nearest_json(lat, lng, limit, max_distance_m, _ttl_bucket):
+    """Fetch the /nearest JSON body; the TTL bucket argument expires cached entries."""
+    with pooled_connection() as conn:
         cur = conn.cursor()
-        where_clause = ""
-        query_params = [lng, lat]
-
-        if max_distance_m is not None:
-            where_clause = """
-            WHERE ST_DWithin(
-                geom::geography,
-                ST_MakePoint(%s, %s)::geography,
-                %s
+        if max_distance_m is None:
+            cur.execute("EXECUTE nearest_trees (%s, %s, %s);", (lng, lat, limit))
+        else:
+            cur.execute(
+                "EXECUTE nearest_trees_within (%s, %s, %s, %s);",
+                (lng, lat, max_distance_m, limit),
             )
-            """
-            query_params.extend([lng, lat, max_distance_m])
-
-        query_params.extend([lng, lat, limit])
-
-        cur.execute(f"""
-            SELECT source, objectid, common_name, botanical_name, address, streetname,
-            dbh_trunk, tree_position_number,
-            to_jsonb(street_trees)->>'original_common_name' AS original_common_name,
-            street_trees.species_id,
-            ST_Distance(geom::geography, ST_MakePoint(%s, %s)::geography) AS distance,
-            ST_X(ST_GeometryN(geom, 1)) AS longitude, ST_Y(ST_GeometryN(geom, 1)) AS latitude
-            FROM street_trees
-            {where_clause}
-            ORDER BY geom <-> ST_SetSRID(ST_MakePoint(%s, %s), 4326)
-            LIMIT %s;
-        """, query_params)
-        results = cur.fetchall()
+        payload = cur.fetchone()[0]
         cur.close()
-    finally:
-        conn.close()
+    return payload
 
-    response = [
-        {
-            "source": row[0],
-            "objectid": row[1],
-            "common_name": row[2],
-            "botanical_name": row[3],
-            "address": row[4],
-            "streetname": row[5],
-            "dbh": row[6],
-            "pos": row[7],
-            "original_common_name": row[8],
-            "species_id": int(row[9]) if row[9] is not None else None,
-            "distance": row[10],
-            "longitude": row[11],
-            "latitude": row[12],
-        }
-        for row in results
-    ]
-    return jsonify(response)
+
+@app.route('/nearest', methods=['GET'])
+def nearest():
+    try:
+        lat, lng, limit, max_distance_m = _parse_nearest_args(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    if NEAREST_CACHE_TTL_S <= 0:
+        payload = _nearest_json.__wrapped__(lat, lng, limit, max_distance_m, None)
+    else:
+        payload = _nearest_json(
+            round(lat, NEAREST_CACHE_PRECISION),
+            round(lng, NEAREST_CACHE_PRECISION),
+            limit,
+            max_distance_m,
+            int(time.monotonic() // NEAREST_CACHE_TTL_S),
+        )
+    return app.response_class(payload, mimetype='application/json')
 
 
 @app.route('/species/<int:species_id>/profile', methods=['GET'])
 def species_profile(species_id):
-    conn = psycopg2.connect(**db_params())
-    try:
+    with pooled_connection() as conn:
         cur = conn.cursor()
         cur.execute(
             """
@@ -162,8 +285,6 @@ def species_profile(species_id):
         )
         row = cur.fetchone()
         cur.close()
-    finally:
-        conn.close()
 
     if row is None:
         return jsonify({"error": "species not found"}), 404
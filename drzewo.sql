@@ -3,6 +3,7 @@ CREATE DATABASE drzewo ;
 \c drzewo
 
 CREATE EXTENSION IF NOT EXISTS postgis;
+CREATE EXTENSION IF NOT EXISTS btree_gist;
 
 
 CREATE TABLE species (
@@ -67,13 +68,16 @@ CREATE TABLE street_trees (
     original_common_name TEXT,
     species_id BIGINT REFERENCES species(id),
     dbh_trunk INTEGER,
-    geom GEOMETRY(MultiPoint, 4326) NOT NULL -- WGS 84
+    geom GEOMETRY(MultiPoint, 4326) NOT NULL, -- WGS 84
+    geog GEOGRAPHY(MultiPoint, 4326) GENERATED ALWAYS AS (geom::geography) STORED
 );
 
 
 ALTER TABLE street_trees ADD CONSTRAINT unique_source_objectid UNIQUE (source, objectid);
 
 CREATE INDEX idx_street_trees_geom_gist ON street_trees USING GIST (geom);
+CREATE INDEX idx_street_trees_geog_gist ON street_trees USING GIST (geog);
+CREATE INDEX idx_street_trees_source_geog_gist ON street_trees USING GIST (source, geog);
 CREATE INDEX idx_street_trees_species_id ON street_trees (species_id);
 
 CREATE TABLE import_runs (
@@ -0,0 +1,8 @@
+ALTER TABLE street_trees
+    ADD COLUMN IF NOT EXISTS geog GEOGRAPHY(MultiPoint, 4326)
+    GENERATED ALWAYS AS (geom::geography) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_street_trees_geog_gist
+    ON street_trees USING GIST (geog);
+
+ANALYZE street_trees;
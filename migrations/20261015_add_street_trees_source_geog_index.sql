@@ -0,0 +1,6 @@
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+CREATE INDEX IF NOT EXISTS idx_street_trees_source_geog_gist
+    ON street_trees USING GIST (source, geog);
+
+ANALYZE street_trees;
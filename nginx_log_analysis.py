@@ -1,9 +1,14 @@
 import argparse
+import glob
 import gzip
+import io
 import re
+import shutil
+import subprocess
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from urllib.parse import parse_qs, urlsplit
+from urllib.parse import unquote_plus, urlsplit
 
 LOG_PATTERN = re.compile(
     r'(?P<ip>\S+) \S+ \S+ \[(?P<timestamp>[^\]]+)\] '
@@ -13,6 +18,12 @@ LOG_PATTERN = re.compile(
 
 BOT_MARKERS = ("bot", "spider", "crawler", "curl", "wget", "python-requests", "uptime")
 BROWSER_MARKERS = ("mozilla", "safari", "chrome", "firefox", "edg", "iphone", "android")
+BOT_PATTERN = re.compile("|".join(map(re.escape, BOT_MARKERS)), re.IGNORECASE)
+BROWSER_PATTERN = re.compile("|".join(map(re.escape, BROWSER_MARKERS)), re.IGNORECASE)
+DAILY_SUMMARY_KEYS = ("by_day", "suspicious_requests_by_day", "estimated_users_by_day")
+TALLY_SUMMARY_KEYS = ("endpoint_counts", "ip_counts", "user_agent_counts", "nearest_query_cells")
+# pigz decompresses noticeably faster than the gzip module; use it when installed.
+PIGZ = shutil.which("pigz")
 SCANNER_PATH_PATTERNS = (
     re.compile(r"^/\.env$"),
     re.compile(r"\.php$", re.IGNORECASE),
@@ -22,31 +33,117 @@ SCANNER_PATH_PATTERNS = (
 )
 
 
-def parse_log_line(line):
-    """Parse one Nginx combined-format log line."""
-    match = LOG_PATTERN.match(line.strip())
-    if not match:
+def is_log_token(value):
+    """Return True for a non-empty value without whitespace, like the regex's \\S+."""
+    return value.split() == [value]
+
+
+def split_log_line(line):
+    """Split a line LOG_PATTERN would match with string scans, else return None."""
+    parts = line.split(" ", 3)
+    if len(parts) != 4 or not parts[3].startswith("["):
+        return None
+    ip, ident, user, rest = parts
+    if not (is_log_token(ip) and is_log_token(ident) and is_log_token(user)):
+        return None
+
+    timestamp_end = rest.find('] "')
+    request_start = timestamp_end + 3
+    request_end = rest.find('" ', request_start)
+    if timestamp_end < 2 or request_end < 0 or "]" in rest[1:timestamp_end]:
         return None
+    request = rest[request_start:request_end]
+    method, _, request_rest = request.partition(" ")
+    target, _, protocol = request_rest.rpartition(" ")
+    if (
+        '"' in request
+        or not (method.isascii() and method.isalpha() and method.isupper())
+        or not target
+        or not protocol
+    ):
+        return None
+
+    fields = rest[request_end + 2 :].split(" ", 2)
+    if len(fields) != 3:
+        return None
+    status, size, quoted = fields
+    referer_end = quoted.find('"', 1)
+    user_agent_end = quoted.find('"', referer_end + 3)
+    if (
+        len(status) != 3
+        or not status.isdecimal()
+        or not is_log_token(size)
+        or not quoted.startswith('"')
+        or referer_end < 0
+        or quoted[referer_end : referer_end + 3] != '" "'
+        or user_agent_end < 0
+    ):
+        return None
+
+    return {
+        "ip": ip,
+        "timestamp": rest[1:timestamp_end],
+        "method": method,
+        "target": target,
+        "protocol": protocol,
+        "status": status,
+        "bytes": size,
+        "referer": quoted[1:referer_end],
+        "user_agent": quoted[referer_end + 3 : user_agent_end],
+    }
 
-    payload = match.groupdict()
-    split_target = urlsplit(payload["target"])
-    payload["path"] = split_target.path or "<empty>"
-    payload["query"] = parse_qs(split_target.query)
+
+def parse_log_line(line):
+    """Parse one Nginx combined-format log line."""
+    line = line.strip()
+    payload = split_log_line(line)
+    if payload is None:
+        # Odd lines that the scanner rejects still get the full regex treatment.
+        match = LOG_PATTERN.match(line)
+        if not match:
+            return None
+        payload = match.groupdict()
+
+    target = payload["target"]
+    if target.startswith("/") and not target.startswith("//") and "#" not in target:
+        path, _, query = target.partition("?")
+    else:
+        # Absolute URIs, network paths and fragments need the full URL parser.
+        split_target = urlsplit(target)
+        path, query = split_target.path, split_target.query
+    payload["path"] = path or "<empty>"
+    payload["query"] = query
     payload["status"] = int(payload["status"])
     payload["day"] = payload["timestamp"].split(":", 1)[0]
     return payload
 
 
+def nearest_coordinates(query):
+    """Return the first non-empty lat and lng values from a raw query string."""
+    lat = lng = None
+    for pair in query.split("&"):
+        name, _, value = pair.partition("=")
+        if not value or (name != "lat" and name != "lng"):
+            continue
+        if "%" in value or "+" in value:
+            value = unquote_plus(value)
+        if name == "lat" and lat is None:
+            lat = value
+        elif name == "lng" and lng is None:
+            lng = value
+        if lat is not None and lng is not None:
+            break
+    return lat, lng
+
+
 def is_bot_user_agent(user_agent):
-    user_agent = (user_agent or "").lower()
-    return any(marker in user_agent for marker in BOT_MARKERS)
+    return BOT_PATTERN.search(user_agent or "") is not None
 
 
-def is_browser_user_agent(user_agent):
-    user_agent = (user_agent or "").lower()
-    return any(marker in user_agent for marker in BROWSER_MARKERS) and not is_bot_user_agent(
-        user_agent
-    )
+def is_browser_user_agent(user_agent, is_bot=None):
+    if is_bot is None:
+        is_bot = is_bot_user_agent(user_agent)
+    return not is_bot and BROWSER_PATTERN.search(user_agent or "") is not None
 
 
 def is_scanner_path(path):
@@ -56,31 +153,44 @@ def is_scanner_path(path):
 
 def iter_log_lines(path):
     """Yield log lines from plain text or gzip-compressed files."""
+    if PIGZ and str(path).endswith(".gz"):
+        yield from iter_pigz_lines(path)
+        return
     opener = gzip.open if str(path).endswith(".gz") else open
     with opener(path, "rt", encoding="utf-8", errors="replace") as handle:
         yield from handle
 
 
+def iter_pigz_lines(path):
+    """Yield lines from a gzip file decompressed by an external pigz process."""
+    with subprocess.Popen([PIGZ, "-dc", str(path)], stdout=subprocess.PIPE) as process:
+        yield from io.TextIOWrapper(process.stdout, encoding="utf-8", errors="replace")
+    if process.returncode:
+        raise OSError(f"pigz exited with status {process.returncode} for {path}")
+
+
 def expand_log_paths(patterns):
     """Expand provided files/globs into a sorted unique path list."""
-    paths = []
+    paths = set()
     for pattern in patterns:
-        candidate = Path(pattern)
         if any(char in pattern for char in "*?[]"):
-            paths.extend(Path().glob(pattern))
-        elif candidate.exists():
-            paths.append(candidate)
-    return sorted({path.resolve() for path in paths})
+            # glob handles absolute patterns, which Path().glob rejects.
+            paths.update(Path(match).resolve() for match in glob.iglob(pattern))
+        elif Path(pattern).exists():
+            paths.add(Path(pattern).resolve())
+    return sorted(paths)
 
 
-def analyze_logs(paths, top_n=10):
-    """Aggregate request and user-oriented summary metrics."""
+def analyze_log_lines(lines):
+    """Aggregate raw counters for an iterable of log lines."""
     totals = Counter()
     by_day = defaultdict(Counter)
-    endpoint_counts = Counter()
-    ip_counts = Counter()
-    user_agent_counts = Counter()
-    nearest_query_cells = Counter()
+    # High-cardinality tallies use defaultdict(int), which fills new keys in C
+    # instead of through Counter.__missing__; analyze_logs converts them at the end.
+    endpoint_counts = defaultdict(int)
+    ip_counts = defaultdict(int)
+    user_agent_counts = defaultdict(int)
+    nearest_query_cells = defaultdict(int)
     scanner_path_counts = Counter()
     suspicious_requests_by_day = defaultdict(Counter)
     status_counts = Counter()
@@ -90,56 +200,55 @@ def analyze_logs(paths, top_n=10):
     scanner_requests = 0
     empty_user_agent_requests = 0
 
-    for path in paths:
-        for line in iter_log_lines(path):
-            record = parse_log_line(line)
-            if record is None:
-                malformed += 1
-                continue
-
-            day = record["day"]
-            ip = record["ip"]
-            user_agent = record["user_agent"]
-            endpoint = record["path"]
-            status = record["status"]
-
-            totals["requests"] += 1
-            by_day[day]["requests"] += 1
-            endpoint_counts[endpoint] += 1
-            ip_counts[ip] += 1
-            user_agent_counts[user_agent] += 1
-            status_counts[status] += 1
-
-            if user_agent in {"", "-"}:
-                empty_user_agent_requests += 1
-                by_day[day]["empty_user_agent_requests"] += 1
-
-            if is_bot_user_agent(user_agent):
-                bot_requests += 1
-                by_day[day]["bot_requests"] += 1
-
-            if is_scanner_path(endpoint):
-                scanner_requests += 1
-                scanner_path_counts[endpoint] += 1
-                suspicious_requests_by_day[day]["scanner_requests"] += 1
-
-            if endpoint == "/nearest":
-                totals["nearest_requests"] += 1
-                by_day[day]["nearest_requests"] += 1
-                if status < 400:
-                    totals["nearest_success"] += 1
-                    by_day[day]["nearest_success"] += 1
-                lat = record["query"].get("lat", [None])[0]
-                lng = record["query"].get("lng", [None])[0]
-                if lat and lng:
-                    try:
-                        cell = f"{round(float(lat), 2)},{round(float(lng), 2)}"
-                    except ValueError:
-                        cell = None
-                    if cell:
-                        nearest_query_cells[cell] += 1
-                if status < 400 and is_browser_user_agent(user_agent) and lat and lng:
-                    estimated_users_by_day[day].add((ip, user_agent))
+    for line in lines:
+        record = parse_log_line(line)
+        if record is None:
+            malformed += 1
+            continue
+
+        day = record["day"]
+        ip = record["ip"]
+        user_agent = record["user_agent"]
+        endpoint = record["path"]
+        status = record["status"]
+
+        totals["requests"] += 1
+        by_day[day]["requests"] += 1
+        endpoint_counts[endpoint] += 1
+        ip_counts[ip] += 1
+        user_agent_counts[user_agent] += 1
+        status_counts[status] += 1
+
+        if user_agent in {"", "-"}:
+            empty_user_agent_requests += 1
+            by_day[day]["empty_user_agent_requests"] += 1
+
+        is_bot = is_bot_user_agent(user_agent)
+        if is_bot:
+            bot_requests += 1
+            by_day[day]["bot_requests"] += 1
+
+        if is_scanner_path(endpoint):
+            scanner_requests += 1
+            scanner_path_counts[endpoint] += 1
+            suspicious_requests_by_day[day]["scanner_requests"] += 1
+
+        if endpoint == "/nearest":
+            totals["nearest_requests"] += 1
+            by_day[day]["nearest_requests"] += 1
+            if status < 400:
+                totals["nearest_success"] += 1
+                by_day[day]["nearest_success"] += 1
+            lat, lng = nearest_coordinates(record["query"])
+            if lat and lng:
+                try:
+                    cell = f"{round(float(lat), 2)},{round(float(lng), 2)}"
+                except ValueError:
+                    cell = None
+                if cell:
+                    nearest_query_cells[cell] += 1
+            if status < 400 and is_browser_user_agent(user_agent, is_bot) and lat and lng:
+                estimated_users_by_day[day].add((ip, user_agent))
 
     return {
         "totals": totals,
@@ -150,18 +259,56 @@ def analyze_logs(paths, top_n=10):
         "nearest_query_cells": nearest_query_cells,
         "scanner_path_counts": scanner_path_counts,
         "status_counts": status_counts,
-        "estimated_users_by_day": {
-            day: len(users) for day, users in estimated_users_by_day.items()
-        },
+        "estimated_users_by_day": estimated_users_by_day,
         "bot_requests": bot_requests,
         "scanner_requests": scanner_requests,
         "empty_user_agent_requests": empty_user_agent_requests,
         "suspicious_requests_by_day": suspicious_requests_by_day,
         "malformed_lines": malformed,
-        "top_n": top_n,
     }
 
 
+def analyze_log_file(path):
+    """Aggregate raw counters for one log file; runs in worker processes."""
+    return analyze_log_lines(iter_log_lines(path))
+
+
+def merge_log_counts(summary, partial):
+    """Fold one file's raw counters into an accumulated summary in place."""
+    for key, value in partial.items():
+        if key in DAILY_SUMMARY_KEYS:
+            for day, day_value in value.items():
+                summary[key][day].update(day_value)
+        elif isinstance(value, dict):
+            counts = summary[key]
+            for item, count in value.items():
+                counts[item] += count
+        else:
+            summary[key] += value
+
+
+def analyze_logs(paths, top_n=10, workers=None):
+    """Aggregate request and user-oriented summary metrics across log files."""
+    paths = list(paths)
+    summary = analyze_log_lines(())
+    if len(paths) > 1 and workers != 1:
+        # Rotated logs are mostly gzip files; decompressing and parsing is CPU-bound.
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for partial in executor.map(analyze_log_file, paths):
+                merge_log_counts(summary, partial)
+    else:
+        for path in paths:
+            merge_log_counts(summary, analyze_log_file(path))
+
+    for key in TALLY_SUMMARY_KEYS:
+        summary[key] = Counter(summary[key])
+    summary["estimated_users_by_day"] = {
+        day: len(users) for day, users in summary["estimated_users_by_day"].items()
+    }
+    summary["top_n"] = top_n
+    return summary
+
+
 def format_summary(summary):
     """Render a compact text report."""
     lines = []
@@ -228,6 +375,12 @@ def build_argument_parser():
     parser.add_argument(
         "--top", type=int, default=10, help="Number of top entries to display per section."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for multi-file runs (default: CPU count; 1 disables).",
+    )
     return parser
 
 
@@ -237,7 +390,7 @@ def main():
     paths = expand_log_paths(args.paths)
     if not paths:
         raise SystemExit("No matching log files found.")
-    summary = analyze_logs(paths, top_n=args.top)
+    summary = analyze_logs(paths, top_n=args.top, workers=args.workers)
     print(format_summary(summary))
 
 
@@ -11,7 +11,7 @@ DATA_FILE="${2:-}"
 ENV_FILE="${3:-.env.prod}"
 SSH_HOST="${4:-drzewo-user}"
 LOCAL_PORT="${DRZEWO_TUNNEL_LOCAL_PORT:-6543}"
-IMPORT_BATCH_SIZE="${DRZEWO_IMPORT_BATCH_SIZE:-2000}"
+IMPORT_BATCH_SIZE="${DRZEWO_IMPORT_BATCH_SIZE:-10000}"
 REFRESH_MODE="${DRZEWO_REFRESH:-0}"
 TUNNEL_PID=""
 
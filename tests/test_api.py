@@ -1,4 +1,12 @@
+import re
+import threading
+import time
 from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from werkzeug.datastructures import MultiDict
 
 import api
 
@@ -10,7 +18,7 @@ class FakeCursor:
         self.params = None
         self.calls = []
 
-    def execute(self, query, params):
+    def execute(self, query, params=None):
         self.executed = query
         self.params = params
         self.calls.append((query, params))
@@ -31,14 +39,41 @@ class FakeConnection:
     def __init__(self, rows):
         self.cursor_instance = FakeCursor(rows)
         self.closed = False
+        self.session = None
 
     def cursor(self):
         return self.cursor_instance
 
+    def set_session(self, **kwargs):
+        self.session = kwargs
+
     def close(self):
         self.closed = True
 
 
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.checked_out = False
+
+    def getconn(self):
+        self.checked_out = True
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        assert conn is self.conn
+        self.checked_out = False
+        if close:
+            conn.close()
+
+
+def use_fake_pool(monkeypatch, fake_conn):
+    fake_pool = FakePool(fake_conn)
+    monkeypatch.setattr(api, "_db_pool", fake_pool)
+    api._nearest_json.cache_clear()
+    return fake_pool
+
+
 def test_home_page_loads():
     client = api.app.test_client()
     response = client.get("/")
@@ -55,27 +90,14 @@ def test_nearest_requires_coordinates():
 def test_nearest_returns_rows(monkeypatch):
     rows = [
         (
-            "Toronto Open Data Street Trees",
-            1,
-            "Maple",
-            "Acer",
-            "10",
-            "King St",
-            25,
-            1,
-            "Maple",
-            "12",
-            9.3,
-            -79.3832,
-            43.6532,
+            '[{"source": "Toronto Open Data Street Trees", "objectid": 1, '
+            '"common_name": "Maple", "botanical_name": "Acer", "address": "10", '
+            '"streetname": "King St", "dbh": 25, "pos": 1, "original_common_name": "Maple", '
+            '"species_id": 12, "distance": 9.3, "longitude": -79.3832, "latitude": 43.6532}]',
         )
     ]
     fake_conn = FakeConnection(rows)
-
-    def fake_connect(**_kwargs):
-        return fake_conn
-
-    monkeypatch.setattr(api.psycopg2, "connect", fake_connect)
+    fake_pool = use_fake_pool(monkeypatch, fake_conn)
 
     client = api.app.test_client()
     response = client.get("/nearest?lat=43.65&lng=-79.38&limit=5")
@@ -86,7 +108,22 @@ def test_nearest_returns_rows(monkeypatch):
     assert payload[0]["common_name"] == "Maple"
     assert payload[0]["original_common_name"] == "Maple"
     assert payload[0]["species_id"] == 12
-    assert fake_conn.closed is True
+    executed = fake_conn.cursor_instance.executed
+    assert executed == "EXECUTE nearest_trees (%s, %s, %s);"
+    assert any("json_agg" in query for query, _params in fake_conn.cursor_instance.calls)
+    assert fake_pool.checked_out is False
+    assert fake_conn.closed is False
+
+
+def test_nearest_select_lists_columns_in_sorted_key_order():
+    select_list = api.NEAREST_SELECT.split("SELECT", 1)[1].split("FROM street_trees")[0]
+    names = [
+        column.split(" AS ")[-1].split(".")[-1].strip()
+        for column in re.split(r",(?![^(]*\))", select_list)
+    ]
+
+    assert names == sorted(names)
+    assert len(names) == 13
 
 
 def test_nearest_rejects_out_of_bounds_coordinates():
@@ -103,40 +140,177 @@ def test_nearest_rejects_non_numeric_radius():
     assert response.get_json() == {"error": "max_distance_m must be a number"}
 
 
-def test_nearest_clamps_limit_and_radius(monkeypatch):
-    fake_conn = FakeConnection([])
+def test_parse_nearest_args_clamps_limit_and_radius():
+    args = MultiDict({"lat": "43.65", "lng": "-79.38", "limit": "0", "max_distance_m": "0"})
 
-    def fake_connect(**_kwargs):
-        return fake_conn
+    assert api._parse_nearest_args(args) == (43.65, -79.38, api.DEFAULT_LIMIT, api.MIN_RADIUS_M)
 
-    monkeypatch.setattr(api.psycopg2, "connect", fake_connect)
+
+def test_nearest_clamps_limit_and_radius(monkeypatch):
+    fake_conn = FakeConnection([("[]",)])
+    use_fake_pool(monkeypatch, fake_conn)
 
     client = api.app.test_client()
     response = client.get("/nearest?lat=43.65&lng=-79.38&limit=999&max_distance_m=99999")
 
     assert response.status_code == 200
-    assert "ST_DWithin" in fake_conn.cursor_instance.executed
+    calls = fake_conn.cursor_instance.calls
+    assert any("ST_DWithin" in query for query, _params in calls if "PREPARE" in query)
+    assert fake_conn.cursor_instance.executed.startswith("EXECUTE nearest_trees_within")
     params = fake_conn.cursor_instance.params
     assert params[-1] == api.MAX_LIMIT
     assert api.MAX_RADIUS_M in params
 
 
 def test_nearest_uses_default_limit_when_missing(monkeypatch):
-    fake_conn = FakeConnection([])
-
-    def fake_connect(**_kwargs):
-        return fake_conn
-
-    monkeypatch.setattr(api.psycopg2, "connect", fake_connect)
+    fake_conn = FakeConnection([("[]",)])
+    use_fake_pool(monkeypatch, fake_conn)
 
     client = api.app.test_client()
     response = client.get("/nearest?lat=43.65&lng=-79.38")
 
     assert response.status_code == 200
+    assert fake_conn.cursor_instance.executed.startswith("EXECUTE nearest_trees ")
     params = fake_conn.cursor_instance.params
     assert params[-1] == api.DEFAULT_LIMIT
 
 
+def test_nearest_prepares_statements_once_per_connection(monkeypatch):
+    fake_conn = FakeConnection([("[]",)])
+    use_fake_pool(monkeypatch, fake_conn)
+
+    client = api.app.test_client()
+    client.get("/nearest?lat=43.65&lng=-79.38")
+    client.get("/nearest?lat=43.66&lng=-79.39")
+
+    queries = [query for query, _params in fake_conn.cursor_instance.calls]
+    assert sum(query.lstrip().startswith("PREPARE") for query in queries) == 2
+    assert sum(query.startswith("EXECUTE nearest_trees ") for query in queries) == 2
+    assert fake_conn.session == {"readonly": True, "autocommit": True}
+
+
+def test_nearest_serves_repeated_lookups_from_cache(monkeypatch):
+    fake_conn = FakeConnection([("[]",)])
+    use_fake_pool(monkeypatch, fake_conn)
+
+    client = api.app.test_client()
+    client.get("/nearest?lat=43.65&lng=-79.38")
+    client.get("/nearest?lat=43.650001&lng=-79.380001")
+    client.get("/nearest?lat=43.65&lng=-79.38&limit=5")
+
+    queries = [query for query, _params in fake_conn.cursor_instance.calls]
+    assert sum(query.startswith("EXECUTE nearest_trees ") for query in queries) == 2
+
+
+def test_nearest_discards_connection_after_connection_error(monkeypatch):
+    fake_conn = FakeConnection([("[]",)])
+    fake_pool = use_fake_pool(monkeypatch, fake_conn)
+
+    def execute(query, params=None):
+        raise api.psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    fake_conn.cursor_instance.execute = execute
+    client = api.app.test_client()
+    response = client.get("/nearest?lat=43.65&lng=-79.38")
+
+    assert response.status_code == 500
+    assert fake_pool.checked_out is False
+    assert fake_conn.closed is True
+
+
+def test_nearest_returns_503_when_pool_is_exhausted(monkeypatch):
+    fake_pool = use_fake_pool(monkeypatch, FakeConnection([("[]",)]))
+
+    def getconn():
+        raise api.psycopg2.pool.PoolError("connection pool exhausted")
+
+    fake_pool.getconn = getconn
+    client = api.app.test_client()
+    response = client.get("/nearest?lat=43.65&lng=-79.38")
+
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "database is busy, try again shortly"}
+
+
+class FakeServerConnection:
+    def __init__(self):
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def close(self):
+        self.closed = 1
+
+
+def test_blocking_pool_opens_lazily_and_keeps_returned_connections(monkeypatch):
+    opened = []
+
+    def connect(**_kwargs):
+        opened.append(FakeServerConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(api.psycopg2, "connect", connect)
+    pool = api.BlockingConnectionPool(3, 0.01)
+    assert len(opened) == 1
+
+    first, second = pool.getconn(), pool.getconn()
+    pool.putconn(first)
+    pool.putconn(second)
+
+    assert len(opened) == 2
+    assert not any(conn.closed for conn in opened)
+    assert {id(pool.getconn()), id(pool.getconn())} == {id(first), id(second)}
+    assert len(opened) == 2
+
+
+def test_blocking_pool_waits_for_a_free_connection_then_gives_up(monkeypatch):
+    monkeypatch.setattr(api.psycopg2, "connect", lambda **_kwargs: FakeServerConnection())
+    pool = api.BlockingConnectionPool(1, 0.2)
+    conn = pool.getconn()
+    threading.Timer(0.05, pool.putconn, args=(conn,)).start()
+
+    assert pool.getconn() is conn
+    pool._timeout = 0.01
+    with pytest.raises(api.psycopg2.pool.PoolError):
+        pool.getconn()
+
+
+def test_db_pool_is_created_once_under_concurrent_first_requests(monkeypatch):
+    created = []
+
+    def fake_pool(maxconn, timeout, **kwargs):
+        time.sleep(0.05)
+        created.append((maxconn, timeout))
+        return object()
+
+    monkeypatch.setattr(api, "_db_pool", None)
+    monkeypatch.setattr(api, "BlockingConnectionPool", fake_pool)
+    threads = [threading.Thread(target=api.db_pool) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created == [(api.DB_POOL_MAX_CONN, api.DB_POOL_TIMEOUT_S)]
+
+
+def test_nearest_skips_cache_when_ttl_is_zero(monkeypatch):
+    fake_conn = FakeConnection([("[]",)])
+    use_fake_pool(monkeypatch, fake_conn)
+    monkeypatch.setattr(api, "NEAREST_CACHE_TTL_S", 0)
+
+    client = api.app.test_client()
+    first = client.get("/nearest?lat=43.650001&lng=-79.380001")
+    second = client.get("/nearest?lat=43.650001&lng=-79.380001")
+
+    assert first.status_code == second.status_code == 200
+    executes = [
+        params
+        for query, params in fake_conn.cursor_instance.calls
+        if query.startswith("EXECUTE nearest_trees ")
+    ]
+    assert executes == [(-79.380001, 43.650001, api.DEFAULT_LIMIT)] * 2
+
+
 def test_species_profile_returns_sourced_profile(monkeypatch):
     rows = [
         (
@@ -159,11 +333,7 @@ def test_species_profile_returns_sourced_profile(monkeypatch):
         )
     ]
     fake_conn = FakeConnection(rows)
-
-    def fake_connect(**_kwargs):
-        return fake_conn
-
-    monkeypatch.setattr(api.psycopg2, "connect", fake_connect)
+    use_fake_pool(monkeypatch, fake_conn)
 
     client = api.app.test_client()
     response = client.get("/species/12/profile")
@@ -210,11 +380,7 @@ def test_species_profile_returns_null_profile_for_unenriched_species(monkeypatch
         )
     ]
     fake_conn = FakeConnection(rows)
-
-    def fake_connect(**_kwargs):
-        return fake_conn
-
-    monkeypatch.setattr(api.psycopg2, "connect", fake_connect)
+    use_fake_pool(monkeypatch, fake_conn)
 
     client = api.app.test_client()
     response = client.get("/species/12/profile")
@@ -229,11 +395,7 @@ def test_species_profile_returns_null_profile_for_unenriched_species(monkeypatch
 
 def test_species_profile_returns_404_for_unknown_species(monkeypatch):
     fake_conn = FakeConnection([])
-
-    def fake_connect(**_kwargs):
-        return fake_conn
-
-    monkeypatch.setattr(api.psycopg2, "connect", fake_connect)
+    use_fake_pool(monkeypatch, fake_conn)
 
     client = api.app.test_client()
     response = client.get("/species/999/profile")
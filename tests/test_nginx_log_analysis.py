@@ -1,3 +1,5 @@
+import gzip
+import shutil
 from collections import Counter
 
 import nginx_log_analysis
@@ -15,7 +17,7 @@ def test_parse_log_line_extracts_path_and_query():
 
     assert record["ip"] == "203.0.113.10"
     assert record["path"] == "/nearest"
-    assert record["query"]["lat"] == ["43.65"]
+    assert record["query"] == "lat=43.65&lng=-79.38&limit=40"
     assert record["status"] == 200
 
 
@@ -30,6 +32,99 @@ def test_parse_log_line_normalizes_empty_path():
     assert record["path"] == "<empty>"
 
 
+def test_parse_log_line_uses_url_parser_for_absolute_targets():
+    line = (
+        '203.0.113.10 - - [01/Mar/2026:02:10:00 +0000] '
+        '"GET http://treeseek.ca/nearest?lat=1&lng=2 HTTP/1.1" 200 1 "-" "-"'
+    )
+
+    record = nginx_log_analysis.parse_log_line(line)
+
+    assert record["path"] == "/nearest"
+    assert record["query"] == "lat=1&lng=2"
+
+
+def test_nearest_coordinates_reads_first_non_empty_values():
+    query = "limit=5&lat=&lat=43.65&lng=-79.38%20&lng=0"
+
+    assert nginx_log_analysis.nearest_coordinates(query) == ("43.65", "-79.38 ")
+    assert nginx_log_analysis.nearest_coordinates("limit=5") == (None, None)
+
+
+def test_split_log_line_matches_regex_fields():
+    lines = [
+        '203.0.113.10 - - [01/Mar/2026:02:10:00 +0000] '
+        '"GET /nearest?lat=43.65&lng=-79.38 HTTP/1.1" 200 123 "-" "Mozilla/5.0 (iPhone)"',
+        '198.51.100.8 - bob [01/Mar/2026:02:11:00 +0000] '
+        '"POST /a b HTTP/1.1" 201 - "https://treeseek.ca/" "" "203.0.113.99"',
+    ]
+
+    for line in lines:
+        expected = nginx_log_analysis.LOG_PATTERN.match(line).groupdict()
+        assert nginx_log_analysis.split_log_line(line) == expected
+
+
+def test_split_log_line_rejects_lines_the_regex_rejects():
+    lines = [
+        # Empty ident field.
+        '203.0.113.10  - [01/Mar/2026:02:10:00 +0000] "GET / HTTP/1.1" 200 1 "-" "curl/8.0.1"',
+        # Tab-separated fields.
+        '203.0.113.10\t- - [01/Mar/2026:02:10:00 +0000] "GET / HTTP/1.1" 200 1 "-" "curl/8.0.1"',
+        '203.0.113.10 -\t- [01/Mar/2026:02:10:00 +0000] "GET / HTTP/1.1" 200 1 "-" "curl/8.0.1"',
+        '203.0.113.10 - - [01/Mar/2026:02:10:00 +0000] "GET / HTTP/1.1" 200 1\t2 "-" "curl/8.0.1"',
+        # Empty timestamp and a stray bracket inside it.
+        '203.0.113.10 - - [] "GET / HTTP/1.1" 200 1 "-" "curl/8.0.1"',
+        '203.0.113.10 - - [01/Mar]/2026 +0000] "GET / HTTP/1.1" 200 1 "-" "curl/8.0.1"',
+    ]
+
+    for line in lines:
+        assert nginx_log_analysis.LOG_PATTERN.match(line) is None
+        assert nginx_log_analysis.split_log_line(line) is None
+        assert nginx_log_analysis.parse_log_line(line) is None
+
+
+def test_parse_log_line_falls_back_to_regex_for_unusual_request_lines():
+    line = (
+        '203.0.113.10 - - [01/Mar/2026:02:10:00 +0000] '
+        '"GET / HTTP/1.1 " 200 1 "-" "curl/8.0.1"'
+    )
+
+    assert nginx_log_analysis.split_log_line(line) is None
+    assert nginx_log_analysis.parse_log_line(line)["path"] == "/"
+
+
+def test_user_agent_markers_match_case_insensitively():
+    assert nginx_log_analysis.is_bot_user_agent("Googlebot/2.1")
+    assert not nginx_log_analysis.is_bot_user_agent(None)
+    assert nginx_log_analysis.is_browser_user_agent("Mozilla/5.0 (iPhone)")
+    assert not nginx_log_analysis.is_browser_user_agent("Mozilla/5.0 (compatible; Googlebot/2.1)")
+
+
+def test_iter_log_lines_reads_gzip_with_and_without_pigz(tmp_path, monkeypatch):
+    log_path = tmp_path / "access.log.2.gz"
+    with gzip.open(log_path, "wt", encoding="utf-8") as handle:
+        handle.write("first\nsecond\n")
+
+    monkeypatch.setattr(nginx_log_analysis, "PIGZ", None)
+    assert list(nginx_log_analysis.iter_log_lines(log_path)) == ["first\n", "second\n"]
+
+    # gzip -dc behaves like pigz -dc, so it stands in for the external decompressor.
+    monkeypatch.setattr(nginx_log_analysis, "PIGZ", shutil.which("gzip"))
+    assert list(nginx_log_analysis.iter_log_lines(log_path)) == ["first\n", "second\n"]
+
+
+def test_expand_log_paths_accepts_absolute_glob_patterns(tmp_path):
+    (tmp_path / "access.log").write_text("", encoding="utf-8")
+    (tmp_path / "access.log.2.gz").write_bytes(b"")
+    (tmp_path / "error.log").write_text("", encoding="utf-8")
+
+    patterns = [str(tmp_path / "access.log"), str(tmp_path / "access.log*.gz")]
+
+    paths = nginx_log_analysis.expand_log_paths(patterns + patterns)
+
+    assert paths == [tmp_path / "access.log", tmp_path / "access.log.2.gz"]
+
+
 def test_analyze_logs_counts_estimated_users_and_nearest_cells(tmp_path):
     log_path = tmp_path / "access.log"
     log_path.write_text(
@@ -80,6 +175,28 @@ def test_analyze_logs_tracks_scanner_paths_and_empty_user_agents(tmp_path):
     assert summary["status_counts"][404] == 2
 
 
+def test_analyze_logs_merges_counts_across_worker_processes(tmp_path):
+    line = (
+        '203.0.113.10 - - [01/Mar/2026:02:10:00 +0000] '
+        '"GET /nearest?lat=43.65&lng=-79.38 HTTP/1.1" 200 123 "-" '
+        '"Mozilla/5.0 (iPhone; CPU iPhone OS 18_0 like Mac OS X)"'
+    )
+    paths = []
+    for name in ("access.log", "access.log.1"):
+        log_path = tmp_path / name
+        log_path.write_text(line + "\n", encoding="utf-8")
+        paths.append(log_path)
+
+    summary = nginx_log_analysis.analyze_logs(paths, top_n=5, workers=2)
+
+    assert summary["totals"]["requests"] == 2
+    assert summary["by_day"]["01/Mar/2026"]["nearest_success"] == 2
+    assert summary["nearest_query_cells"]["43.65,-79.38"] == 2
+    assert summary["ip_counts"].most_common(1) == [("203.0.113.10", 2)]
+    assert summary["estimated_users_by_day"]["01/Mar/2026"] == 1
+    assert summary["top_n"] == 5
+
+
 def test_format_summary_includes_core_sections():
     summary = {
         "totals": {"requests": 1, "nearest_requests": 1, "nearest_success": 1},
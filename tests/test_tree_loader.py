@@ -1,9 +1,14 @@
+import re
 from datetime import datetime, timezone
 
+import pytest
+
 import tree_loader
 
 
 class FakeCursor:
+    __slots__ = ("fetchone_result", "fetchall_result", "rowcount", "calls", "closed")
+
     def __init__(self, fetchone_result=(0,), fetchall_result=None, rowcount=0):
         self.fetchone_result = fetchone_result
         self.fetchall_result = fetchall_result or []
@@ -19,29 +24,105 @@ class FakeCursor:
     def fetchall(self):
         return self.fetchall_result
 
+    def copy_expert(self, sql, file):
+        self.calls.append((sql, "".join(iter(lambda: file.read(8192), ""))))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConn:
+    __slots__ = ("autocommit", "commits", "rollbacks", "cursor_instance")
+
+    def __init__(self):
+        self.autocommit = True
+        self.commits = 0
+        self.rollbacks = 0
+        self.cursor_instance = FakeCursor()
+
+    def cursor(self):
+        return self.cursor_instance
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
 
 def test_delete_city_rows_uses_source_name():
     cursor = FakeCursor()
 
     tree_loader.delete_city_rows(cursor, "Oakville Parks Tree Forestry")
 
-    assert "DELETE FROM street_trees WHERE source = %s" in cursor.calls[0][0]
+    assert cursor.calls[0][0] is tree_loader.DELETE_CITY_ROWS_SQL
     assert cursor.calls[0][1] == ("Oakville Parks Tree Forestry",)
 
 
-def test_count_city_rows_returns_count():
+def test_record_completed_import_run_counts_rows_in_the_insert():
     cursor = FakeCursor(fetchone_result=(29455,))
+    started_at = datetime(2026, 2, 18, tzinfo=timezone.utc)
 
-    count = tree_loader.count_city_rows(cursor, "Peterborough Open Data Tree Inventory")
+    count = tree_loader.record_completed_import_run(
+        cursor,
+        city="peterborough",
+        source_name="Peterborough Open Data Tree Inventory",
+        source_file="/tmp/Tree_Inventory.geojson",
+        refresh_mode=False,
+        started_at=started_at,
+    )
 
+    query, params = cursor.calls[0]
     assert count == 29455
-    assert "SELECT COUNT(*) FROM street_trees WHERE source = %s" in cursor.calls[0][0]
+    assert query is tree_loader.RECORD_COMPLETED_IMPORT_RUN_SQL
+    assert params == (
+        "peterborough",
+        "Peterborough Open Data Tree Inventory",
+        "/tmp/Tree_Inventory.geojson",
+        False,
+        "Peterborough Open Data Tree Inventory",
+        started_at,
+    )
+
+
+def test_tune_import_session_sets_transaction_local_settings():
+    cursor = FakeCursor()
+
+    tree_loader.tune_import_session(cursor)
+
+    assert cursor.calls == [(tree_loader.IMPORT_SESSION_SETTINGS_SQL, None)]
+    assert "SET LOCAL synchronous_commit = off;" in tree_loader.IMPORT_SESSION_SETTINGS_SQL
+    assert "SET LOCAL temp_buffers = '256MB';" in tree_loader.IMPORT_SESSION_SETTINGS_SQL
+
+
+def test_import_session_commits_once_after_all_statements():
+    conn = FakeConn()
+
+    with tree_loader.import_session(conn) as cursor:
+        tree_loader.delete_city_rows(cursor, "Oakville Parks Tree Forestry")
+        tree_loader.delete_city_rows(cursor, "Markham Open Data Street Trees")
+
+    assert conn.autocommit is False
+    assert len(conn.cursor_instance.calls) == 2
+    assert conn.commits == 1
+    assert conn.rollbacks == 0
+    assert conn.cursor_instance.closed is True
+
+
+def test_import_session_rolls_back_on_error():
+    conn = FakeConn()
+
+    with pytest.raises(ValueError):
+        with tree_loader.import_session(conn):
+            raise ValueError("bad row")
+
+    assert conn.commits == 0
+    assert conn.rollbacks == 1
 
 
 def test_record_import_run_writes_expected_values():
     cursor = FakeCursor()
     started_at = datetime(2026, 2, 18, tzinfo=timezone.utc)
-    finished_at = datetime(2026, 2, 18, 1, tzinfo=timezone.utc)
 
     tree_loader.record_import_run(
         cursor,
@@ -52,14 +133,39 @@ def test_record_import_run_writes_expected_values():
         row_count=29455,
         status="completed",
         started_at=started_at,
-        finished_at=finished_at,
     )
 
-    params = cursor.calls[0][1]
+    query, params = cursor.calls[0]
+    assert query is tree_loader.RECORD_IMPORT_RUN_SQL
     assert params[0] == "peterborough"
     assert params[3] is True
     assert params[4] == 29455
     assert params[5] == "completed"
+    assert params[7] == started_at
+    assert len(params) == 8
+    assert "clock_timestamp()" in query
+
+
+def test_log_failed_import_reuses_the_import_connection():
+    conn = FakeConn()
+    conn.cursor_instance.fetchone_result = ("import_runs",)
+    started_at = datetime(2026, 2, 18, tzinfo=timezone.utc)
+
+    tree_loader.log_failed_import(
+        conn,
+        "oakville",
+        tree_loader.CITY_HANDLERS["oakville"],
+        "/tmp/oakville.geojson",
+        False,
+        started_at,
+        "bad row",
+    )
+
+    query, params = conn.cursor_instance.calls[-1]
+    assert query is tree_loader.RECORD_IMPORT_RUN_SQL
+    assert params[5] == "failed"
+    assert params[6] == "bad row"
+    assert conn.commits == 1
 
 
 def test_ensure_species_enrichment_tables_creates_profile_schema():
@@ -91,6 +197,19 @@ def test_ensure_species_enrichment_tables_skips_existing_profile_schema():
     assert "to_regclass('public.idx_species_profile_species_id')" in cursor.calls[1][0]
 
 
+def test_ensure_street_tree_geography_column_adds_generated_column_and_index():
+    cursor = FakeCursor(fetchone_result=(None,))
+
+    tree_loader.ensure_street_tree_geography_column(cursor)
+
+    assert len(cursor.calls) == 4
+    assert "information_schema.columns" in cursor.calls[0][0]
+    assert cursor.calls[0][1] == ("street_trees", "geog")
+    assert "GENERATED ALWAYS AS (geom::geography) STORED" in cursor.calls[1][0]
+    assert "to_regclass('public.idx_street_trees_geog_gist')" in cursor.calls[2][0]
+    assert "USING GIST (geog)" in cursor.calls[3][0]
+
+
 def test_apply_species_catalog_to_source_updates_resolved_rows(monkeypatch):
     cursor = FakeCursor(
         fetchall_result=[
@@ -125,6 +244,128 @@ def test_apply_species_catalog_to_source_updates_resolved_rows(monkeypatch):
     assert "tree.species_id IS DISTINCT FROM species.id" in cursor.calls[3][0]
 
 
+def test_ensure_street_tree_source_geog_index_enables_btree_gist():
+    cursor = FakeCursor(fetchone_result=(None,))
+
+    tree_loader.ensure_street_tree_source_geog_index(cursor)
+
+    assert "to_regclass('public.idx_street_trees_source_geog_gist')" in cursor.calls[0][0]
+    assert cursor.calls[1][0] == "CREATE EXTENSION IF NOT EXISTS btree_gist;"
+    assert "USING GIST (source, geog)" in cursor.calls[2][0]
+
+
+def test_check_street_tree_conflict_key_warns_without_ddl(capsys):
+    cursor = FakeCursor(fetchone_result=(False,))
+
+    assert tree_loader.check_street_tree_conflict_key(cursor) is False
+
+    assert cursor.calls == [
+        (tree_loader.STREET_TREE_CONFLICT_KEY_SQL, None),
+        (tree_loader.DUPLICATE_STREET_TREE_KEYS_SQL, None),
+    ]
+    assert "no unique index on (source, objectid)" in capsys.readouterr().out
+
+
+def test_check_street_tree_conflict_key_accepts_any_matching_unique_index():
+    cursor = FakeCursor(fetchone_result=(True,))
+
+    assert tree_loader.check_street_tree_conflict_key(cursor) is True
+
+    assert len(cursor.calls) == 1
+    assert "indisunique" in cursor.calls[0][0]
+    assert "ARRAY['objectid', 'source']" in cursor.calls[0][0]
+
+
+def test_cluster_street_trees_uses_geography_index():
+    cursor = FakeCursor()
+
+    tree_loader.cluster_street_trees(cursor)
+
+    assert cursor.calls == [("CLUSTER street_trees USING idx_street_trees_geog_gist;", None)]
+
+
+def test_drop_and_recreate_street_tree_indexes_round_trip_definitions():
+    definitions = [
+        (
+            "idx_street_trees_geog_gist",
+            "CREATE INDEX idx_street_trees_geog_gist ON public.street_trees USING gist (geog)",
+        )
+    ]
+    cursor = FakeCursor(fetchall_result=definitions)
+
+    dropped = tree_loader.drop_street_tree_indexes(cursor)
+    tree_loader.recreate_street_tree_indexes(cursor, dropped)
+
+    assert dropped == definitions
+    assert cursor.calls[0][0] is tree_loader.STREET_TREE_SECONDARY_INDEXES_SQL
+    assert cursor.calls[1][0] == 'DROP INDEX IF EXISTS public."idx_street_trees_geog_gist";'
+    assert cursor.calls[2][0] == f"{definitions[0][1]};"
+
+
+def test_copy_rows_streams_escaped_rows_into_stage():
+    cursor = FakeCursor()
+    rows = iter([
+        ("Toronto Open Data Street Trees", 1, None, "Back\\slash\tTab\nLine", 2.5),
+        None,
+        ("Toronto Open Data Street Trees", 2, "Park", "10 King", None),
+    ])
+
+    tree_loader.copy_rows(
+        cursor, ("source", "objectid", "site", "address", "dbh_trunk"), rows, batch_size=1
+    )
+
+    copy_sql, payload = cursor.calls[0]
+    assert copy_sql.startswith("COPY street_trees_stage (source, objectid, site, address")
+    assert payload == (
+        "Toronto Open Data Street Trees\t1\t\\N\tBack\\\\slash\\tTab\\nLine\t2.5\n"
+        "Toronto Open Data Street Trees\t2\tPark\t10 King\t\\N\n"
+    )
+    assert len(cursor.calls) == 1
+
+
+def test_insert_staged_rows_moves_stage_into_street_trees():
+    cursor = FakeCursor()
+
+    tree_loader.create_stage_table(cursor, ("source", "objectid", "geom_ewkb"))
+    tree_loader.insert_staged_rows(cursor, "INSERT INTO street_trees SELECT 1;")
+
+    assert cursor.calls[0][0] == "DROP TABLE IF EXISTS street_trees_stage;"
+    assert "source TEXT, objectid TEXT, geom_ewkb TEXT" in cursor.calls[1][0]
+    assert "ON COMMIT DROP" in cursor.calls[1][0]
+    assert cursor.calls[2][0] == "INSERT INTO street_trees SELECT 1;"
+    assert cursor.calls[3][0] == "DROP TABLE street_trees_stage;"
+
+
+def test_iter_features_streams_geojson_features(tmp_path):
+    path = tmp_path / "trees.geojson"
+    path.write_text(
+        '{"type": "FeatureCollection", "features": ['
+        '{"properties": {"OBJECTID": 1},'
+        ' "geometry": {"type": "Point", "coordinates": [-79.4, 43.7]}},'
+        '{"properties": {"OBJECTID": 2}, "geometry": null}]}'
+    )
+
+    features = list(tree_loader.iter_features(path))
+
+    assert [feature["properties"]["OBJECTID"] for feature in features] == [1, 2]
+    assert features[0]["geometry"]["coordinates"] == [-79.4, 43.7]
+    assert isinstance(features[0]["geometry"]["coordinates"][0], float)
+
+
+def test_iter_features_reads_line_delimited_geojson(tmp_path):
+    feature = '{"properties": {"OBJECTID": %d}, "geometry": null}'
+    ndjson_path = tmp_path / "trees.geojsonl"
+    ndjson_path.write_text(f"{feature % 1}\n\n{feature % 2}\n")
+    seq_path = tmp_path / "trees.json"
+    seq_path.write_text(f"\x1e{feature % 3}\n\x1e{feature % 4}\n")
+
+    ndjson_ids = [f["properties"]["OBJECTID"] for f in tree_loader.iter_features(ndjson_path)]
+    seq_ids = [f["properties"]["OBJECTID"] for f in tree_loader.iter_features(seq_path)]
+
+    assert ndjson_ids == [1, 2]
+    assert seq_ids == [3, 4]
+
+
 def test_species_seed_files_load():
     catalog = tree_loader.load_species_catalog()
 
@@ -142,6 +383,26 @@ def test_resolved_species_values_uses_canadian_english_aliases():
     assert species_key == "betula_populifolia"
 
 
+def test_resolved_species_values_reuses_repeated_species_text():
+    tree_loader.resolved_species_values.cache_clear()
+
+    first = tree_loader.resolved_species_values("Maple, Norway", "Acer platanoides", "Toronto")
+    second = tree_loader.resolved_species_values("Maple, Norway", "Acer platanoides", "Toronto")
+
+    assert second is first
+    assert tree_loader.resolved_species_values.cache_info().hits == 1
+
+
+def test_reloading_species_catalog_clears_resolution_cache(monkeypatch):
+    tree_loader.resolved_species_values("Maple, Norway", "Acer platanoides", "Toronto")
+    monkeypatch.setattr(tree_loader, "_SPECIES_CATALOG_CACHE", None)
+
+    tree_loader.load_species_catalog()
+
+    assert tree_loader.resolved_species_values.cache_info().currsize == 0
+    assert tree_loader.resolved_species_values.cache_info().maxsize == 4096
+
+
 def test_resolved_species_values_handles_toronto_white_mulberry():
     common_name, original_common_name, species_key = tree_loader.resolved_species_values(
         "Mulberry, white", "Morus alba", "Toronto Open Data Street Trees"
@@ -197,32 +458,104 @@ def test_standardize_common_name_does_not_invert_unknown_comma_names():
     assert tree_loader.standardize_common_name("Something, Cultivar") == "Something, Cultivar"
 
 
-def test_calgary_row_tuple_uses_shared_schema_fields():
-    row = {
-        "TREE_ASSET_CD": "123",
-        "COMMON_NAME": "Honey Locust",
-        "GENUS": "Gleditsia",
-        "SPECIES": "triacanthos",
-        "CULTIVAR": "",
-        "DBH_CM": "22",
-        "LOCATION_DETAIL": "123 Example St",
-        "COMM_CODE": "DOWNTOWN",
-        "ASSET_TYPE": "Tree",
-        "ASSET_SUBTYPE": "Boulevard",
-        "WAM_ID": "T-32114228",
-        "POINT": "POINT (-114.0719 51.0447)",
-    }
+def test_copy_csv_to_stage_names_stage_columns_from_header(tmp_path):
+    path = tmp_path / "calgary.csv"
+    path.write_text(
+        '\ufeffTREE_ASSET_CD,COMMON_NAME,WAM_ID\n'
+        '123,"Locust, Honey",T-32114228\n',
+        encoding="utf-8",
+    )
+    cursor = FakeCursor()
+
+    tree_loader.copy_csv_to_stage(cursor, path)
+
+    assert '"tree_asset_cd" TEXT, "common_name" TEXT, "wam_id" TEXT' in cursor.calls[1][0]
+    assert cursor.calls[2] == (
+        "COPY street_trees_stage FROM STDIN WITH (FORMAT csv);",
+        '123,"Locust, Honey",T-32114228\n',
+    )
+
+
+def test_stage_common_names_resolves_each_distinct_pair_once(monkeypatch):
+    cursor = FakeCursor(fetchall_result=[("Honey Locust", "Gleditsia triacanthos"), (None, None)])
+    inserted_rows = []
+
+    def fake_execute_values(_cursor, _query, rows, **_kwargs):
+        inserted_rows.extend(rows)
+
+    monkeypatch.setattr(tree_loader, "execute_values", fake_execute_values)
+
+    tree_loader.stage_common_names(cursor, "common_name", "genus")
+
+    assert cursor.calls[0][0] == "SELECT DISTINCT common_name, genus FROM street_trees_stage;"
+    assert inserted_rows == [
+        ("Honey Locust", "Gleditsia triacanthos", "Honey Locust", "Honey Locust"),
+        ("", "", None, None),
+    ]
+
+
+def test_load_calgary_data_transforms_raw_csv_in_sql(tmp_path, monkeypatch):
+    path = tmp_path / "calgary.csv"
+    path.write_text("TREE_ASSET_CD,WAM_ID\n123,T-32114228\n")
+    cursor = FakeCursor(fetchone_result=None, fetchall_result=[])
+    monkeypatch.setattr(tree_loader, "execute_values", lambda *_args, **_kwargs: None)
+
+    tree_loader.load_calgary_data(cursor, path)
+
+    insert_sql = cursor.calls[-2][0]
+    assert "substring(wam_id FROM '[0-9]+$')" in insert_sql
+    assert "regexp_replace(tree_asset_cd, '[^0-9]+', '', 'g')" in insert_sql
+    # float8 round() is half-to-even like Python's round(); numeric would round 12.5 up.
+    assert "round(dbh_cm::float8)::integer" in insert_sql
+    assert "ON CONFLICT (source, objectid) DO NOTHING" in insert_sql
+    assert cursor.calls[-1][0] == "DROP TABLE street_trees_stage;"
+
 
-    result = tree_loader.calgary_row_tuple(row)
+def test_decimal_text_pattern_accepts_what_float_accepts():
+    for value in ("12", "12.", " 12.5 ", ".5", "-3", "1e1", "2.5E-1"):
+        assert re.match(tree_loader.DECIMAL_TEXT_PATTERN, value), value
+        float(value)
+    for value in ("", " ", "abc", "1.2.3", "e5", "NaN", "inf"):
+        assert not re.match(tree_loader.DECIMAL_TEXT_PATTERN, value), value
 
-    assert result[0] == "Calgary Open Data Tree Inventory"
-    assert result[1] == 32114228
-    assert result[2] == "123"
-    assert result[3] == "Honey Locust"
-    assert result[4] == "Honey Locust"
-    assert result[5] == "Gleditsia triacanthos"
-    assert result[9] == "Boulevard"
-    assert result[10] == "POINT (-114.0719 51.0447)"
+
+def test_load_calgary_data_matches_dbh_and_botanical_rules(tmp_path, monkeypatch):
+    path = tmp_path / "calgary.csv"
+    path.write_text("TREE_ASSET_CD,WAM_ID,DBH_CM\n123,T-1,12.\n")
+    cursor = FakeCursor(fetchone_result=None, fetchall_result=[])
+    monkeypatch.setattr(tree_loader, "execute_values", lambda *_args, **_kwargs: None)
+
+    tree_loader.load_calgary_data(cursor, path)
+
+    insert_sql = cursor.calls[-2][0]
+    assert f"WHEN dbh_cm ~ '{tree_loader.DECIMAL_TEXT_PATTERN}'" in insert_sql
+    assert "THEN genus END" in insert_sql
+    assert "NULLIF(btrim(genus)" not in insert_sql
+
+
+def test_load_montreal_data_rounds_dbh_like_python(tmp_path, monkeypatch):
+    path = tmp_path / "montreal.csv"
+    path.write_text("EMP_NO,DHP,Longitude,Latitude\n1,12.5,-73.6,45.5\n")
+    cursor = FakeCursor(fetchall_result=[])
+    monkeypatch.setattr(tree_loader, "execute_values", lambda *_args, **_kwargs: None)
+
+    tree_loader.load_montreal_data(cursor, path)
+
+    assert "round(NULLIF(dhp, '')::float8)::integer" in cursor.calls[-2][0]
+
+
+def test_load_calgary_data_rejects_rows_without_a_numeric_identifier(tmp_path):
+    path = tmp_path / "calgary.csv"
+    path.write_text("TREE_ASSET_CD,WAM_ID\nASSET-X,T-X\n")
+    cursor = FakeCursor(fetchone_result=("ASSET-X",))
+
+    with pytest.raises(ValueError, match="missing a numeric identifier: ASSET-X"):
+        tree_loader.load_calgary_data(cursor, path)
+
+    check_sql = cursor.calls[-1][0]
+    assert check_sql.startswith("SELECT tree_asset_cd FROM street_trees_stage WHERE")
+    assert "IS NULL LIMIT 1;" in check_sql
+    assert not any("INSERT INTO street_trees" in query for query, _params in cursor.calls)
 
 
 def test_toronto_row_tuple_normalizes_point_geometry():
@@ -253,14 +586,101 @@ def test_toronto_row_tuple_normalizes_point_geometry():
     assert result[13] == "Norway Maple"
     assert result[14] == "Maple, Norway"
     assert result[15] == "acer_platanoides"
-    assert '"type": "MultiPoint"' in result[-1]
+    assert result[-3:] == (-79.38, 43.65, None)
+
+
+def test_geojson_row_tuples_skip_features_without_an_id():
+    feature = {
+        "properties": {"OBJECTID": None, "ASSET_ID": ""},
+        "geometry": {"type": "Point", "coordinates": [-79.38, 43.65]},
+    }
+
+    assert tree_loader.toronto_row_tuple(feature) is None
+    assert tree_loader.waterloo_row_tuple(feature) is None
+    assert tree_loader.boston_row_tuple(feature) is None
+
+
+def test_multipoint_ewkb_hex_wraps_points_with_srid():
+    point = {"type": "Point", "coordinates": [1, 2]}
+    multipoint = {"type": "MultiPoint", "coordinates": [[1, 2, 80.5]]}
+
+    assert tree_loader.multipoint_ewkb_hex(point) == (
+        "0104000020e6100000010000000101000000000000000000f03f0000000000000040"
+    )
+    assert tree_loader.multipoint_ewkb_hex(multipoint) == tree_loader.multipoint_ewkb_hex(point)
+    assert tree_loader.multipoint_ewkb_hex(None) is None
+    with pytest.raises(ValueError):
+        tree_loader.multipoint_ewkb_hex({"type": "LineString", "coordinates": []})
+
+
+def test_toronto_row_tuple_tolerates_missing_properties():
+    feature = {
+        "properties": {"OBJECTID": 7, "BOTANICAL_NAME": "Acer platanoides"},
+        "geometry": {"type": "Point", "coordinates": [-79.38, 43.65]},
+    }
+
+    result = tree_loader.toronto_row_tuple(feature)
+
+    assert result[1] == 7
+    assert result[2] is None
+    assert result[16] is None
+
+
+def test_point_geometry_values_accepts_single_point_multipoints():
+    geometry = {"type": "MultiPoint", "coordinates": [[-79.38, 43.65]]}
+
+    assert tree_loader.point_geometry_values(geometry) == (-79.38, 43.65, None)
+
+
+def test_toronto_row_tuple_falls_back_to_ewkb_for_multi_point_features():
+    geometry = {"type": "MultiPoint", "coordinates": [[-79.38, 43.65], [-79.39, 43.66]]}
+    feature = {"properties": {"OBJECTID": 8}, "geometry": geometry}
+
+    result = tree_loader.toronto_row_tuple(feature)
+    null_result = tree_loader.toronto_row_tuple({"properties": {"OBJECTID": 9}, "geometry": None})
+
+    assert result[-3:] == (None, None, tree_loader.multipoint_ewkb_hex(geometry))
+    assert null_result[-3:] == (None, None, None)
+
+
+def test_oakville_row_tuple_leaves_address_assembly_to_sql():
+    feature = {
+        "properties": {
+            "OBJECTID": 5,
+            "STREET_NUMBER": 120,
+            "STREET_NAME": " Lakeshore Rd E ",
+            "SPECIES": "Maple, Norway - Acer platanoides",
+            "DBH": 31,
+        },
+        "geometry": {"type": "Point", "coordinates": [-79.67, 43.44]},
+    }
+
+    result = tree_loader.oakville_row_tuple(feature)
+
+    assert result[1:4] == (5, 120, " Lakeshore Rd E ")
+    assert result[7] == "Acer platanoides"
+    assert result[9] == "Maple, Norway"
+    assert result[10] == 31
+
+
+def test_load_oakville_data_trims_all_whitespace_like_str_strip(tmp_path, monkeypatch):
+    cursor = FakeCursor()
+    monkeypatch.setattr(tree_loader, "iter_features", lambda _filename: iter(()))
+
+    tree_loader.load_oakville_data(cursor, tmp_path / "oakville.geojson")
+
+    insert_sql = cursor.calls[-2][0]
+    strip_characters = tree_loader.STRIP_CHARACTERS_SQL[2:-1].encode().decode("unicode_escape")
+    assert f"NULLIF(btrim(street_name, {tree_loader.STRIP_CHARACTERS_SQL}), '')" in insert_sql
+    assert "\tLakeshore Rd E\r\n\xa0".strip(strip_characters) == "Lakeshore Rd E"
+    assert "\r\n".strip(strip_characters) == ""
 
 
 def test_mississauga_city_is_registered():
     config = tree_loader.CITY_HANDLERS["mississauga"]
 
     assert config["source_name"] == "Mississauga City-Owned Tree Inventory"
-    assert config["loader"] == "load_mississauga_data"
+    assert config["loader"] is tree_loader.load_mississauga_data
 
 
 def test_mississauga_row_tuple_maps_shared_fields():
@@ -292,7 +712,7 @@ def test_mississauga_row_tuple_maps_shared_fields():
     assert result[7] == "Apple Crab Flowering"
     assert result[8] == "Apple Crab Flowering"
     assert result[9] == 22
-    assert '"type": "MultiPoint"' in result[10]
+    assert result[10] == tree_loader.multipoint_ewkb_hex(feature["geometry"])
 
 
 def test_mississauga_row_tuple_falls_back_to_botname():
@@ -320,7 +740,7 @@ def test_san_francisco_city_is_registered():
     config = tree_loader.CITY_HANDLERS["san_francisco"]
 
     assert config["source_name"] == "San Francisco Street Tree Inventory"
-    assert config["loader"] == "load_san_francisco_data"
+    assert config["loader"] is tree_loader.load_san_francisco_data
 
 
 def test_san_francisco_row_tuple_maps_shared_fields():
@@ -340,7 +760,9 @@ def test_san_francisco_row_tuple_maps_shared_fields():
         "latitude": "37.7760911",
     }
 
-    result = tree_loader.san_francisco_row_tuple(row)
+    columns = tree_loader.san_francisco_columns(list(row))
+
+    result = tree_loader.san_francisco_row_tuple(columns(list(row.values())))
 
     assert result[0] == "San Francisco Street Tree Inventory"
     assert result[1] == 123456
@@ -356,11 +778,18 @@ def test_san_francisco_row_tuple_maps_shared_fields():
     assert result[11] == 37.7760911
 
 
+def test_san_francisco_columns_rejects_missing_columns():
+    with pytest.raises(ValueError, match="longitude, latitude"):
+        tree_loader.san_francisco_columns(
+            ["TreeID", "qAddress", "qSiteInfo", "qCaretaker", "qSpecies", "DBH", "SiteOrder"]
+        )
+
+
 def test_madison_city_is_registered():
     config = tree_loader.CITY_HANDLERS["madison_wi"]
 
     assert config["source_name"] == "Madison Urban Forestry Street Trees"
-    assert config["loader"] == "load_madison_data"
+    assert config["loader"] is tree_loader.load_madison_data
 
 
 def test_madison_row_tuple_maps_shared_fields():
@@ -389,14 +818,14 @@ def test_madison_row_tuple_maps_shared_fields():
     assert result[5] == "Skyline Honey Locust"
     assert result[6] == "Honeylocust 'Skyline'"
     assert result[7] == 6
-    assert '"type": "MultiPoint"' in result[8]
+    assert result[8] == tree_loader.multipoint_ewkb_hex(feature["geometry"])
 
 
 def test_geneva_city_is_registered():
     config = tree_loader.CITY_HANDLERS["geneva"]
 
     assert config["source_name"] == "Geneva Cantonal Tree Inventory"
-    assert config["loader"] == "load_geneva_data"
+    assert config["loader"] is tree_loader.load_geneva_data
 
 
 def test_geneva_geojson_row_tuple_maps_shared_fields():
@@ -430,7 +859,7 @@ def test_geneva_geojson_row_tuple_maps_shared_fields():
     assert result[8] == "Peuplier"
     assert result[9] == "populus"
     assert result[10] == 64
-    assert '"type": "MultiPoint"' in result[11]
+    assert result[11] == tree_loader.multipoint_ewkb_hex(feature["geometry"])
 
 
 def test_geneva_arcgis_json_row_tuple_maps_lv95_coordinates():
@@ -461,3 +890,51 @@ def test_geneva_arcgis_json_row_tuple_maps_lv95_coordinates():
     assert result[10] == 64
     assert result[11] == 2504434.43
     assert result[12] == 1122271.21
+
+
+def test_import_cities_runs_inline_with_one_worker(monkeypatch):
+    calls = []
+
+    def fake_import_city(city, filename, refresh_mode, apply_enrichments, batch_size):
+        calls.append((city, filename, refresh_mode, apply_enrichments, batch_size))
+        return city != "calgary"
+
+    monkeypatch.setattr(tree_loader, "import_city", fake_import_city)
+
+    results = tree_loader.import_cities(
+        ["toronto", "calgary"],
+        ["toronto.geojson", "calgary.csv"],
+        refresh_mode=True,
+        batch_size=500,
+        workers=1,
+    )
+
+    assert results == [True, False]
+    assert calls == [
+        ("toronto", "toronto.geojson", True, False, 500),
+        ("calgary", "calgary.csv", True, False, 500),
+    ]
+
+
+def test_import_cities_spawns_workers_instead_of_forking(monkeypatch):
+    contexts = []
+
+    class FakeExecutor:
+        def __init__(self, max_workers, mp_context):
+            contexts.append((max_workers, mp_context.get_start_method()))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def map(self, fn, *iterables):
+            return [True for _ in iterables[0]]
+
+    monkeypatch.setattr(tree_loader, "ProcessPoolExecutor", FakeExecutor)
+
+    results = tree_loader.import_cities(["toronto", "calgary"], ["t.geojson", "c.csv"])
+
+    assert results == [True, True]
+    assert contexts == [(2, "spawn")]
@@ -2,13 +2,21 @@
 
 import argparse
 import csv
-import json
+import itertools
 import math
+import multiprocessing
+import operator
 import re
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from functools import lru_cache
 from os import environ
 from pathlib import Path
 
+import ijson
+import orjson
 import psycopg2
 from dotenv import load_dotenv
 from psycopg2.extras import execute_values
@@ -27,81 +35,55 @@ DB_PARAMS = {
     "port": environ.get("DRZEWO_DB_PORT", "5432"),
 }
 
-DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_SIZE = 10000
 PROGRESS_INTERVAL = 10000
+LINE_DELIMITED_SUFFIXES = (".ndjson", ".geojsonl", ".geojsons", ".jsonl")
+EWKB_MULTIPOINT_HEADER = struct.Struct("<BIII")
+EWKB_MULTIPOINT_SRID_TYPE = 0x20000004
+EWKB_POINT = struct.Struct("<BIdd")
+# Decimal text float() and float8 both accept: "12", "12.", ".5", "1e1"; NaN/Infinity excluded.
+DECIMAL_TEXT_PATTERN = r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$"
+# btrim() character set matching str.strip(): tabs, CR/LF, NBSP and other Unicode spaces.
+STRIP_CHARACTERS_SQL = "E'{}'".format(
+    "".join(f"\\u{code:04x}" for code in range(0x3001) if chr(code).isspace())
+)
+COPY_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
 SPECIES_SEED_DIR = Path(__file__).resolve().parent / "seeds"
 SPECIES_CATALOG_FILE = SPECIES_SEED_DIR / "species.csv"
 SPECIES_ALIASES_FILE = SPECIES_SEED_DIR / "species_aliases.csv"
 _SPECIES_CATALOG_CACHE = None
+# Distinct species strings per source run to the hundreds; the bound keeps multi-city runs flat.
+SPECIES_RESOLUTION_CACHE_SIZE = 4096
 
-# Mappings for city-specific handlers
-CITY_HANDLERS = {
-    "toronto": {
-        "source_name": "Toronto Open Data Street Trees",
-        "loader": "load_toronto_data",
-        "enrichments": ["wikipedia_links", "human_readable_names"],
-    },
-    "ottawa": {
-        "source_name": "Ottawa Open Data Tree Inventory",
-        "loader": "load_ottawa_data",
-        "enrichments": ["wikipedia_links"],
-    },
-    "montreal": {
-        "source_name": "Montreal Open Data Tree Inventory",
-        "loader": "load_montreal_data",
-        "enrichments": ["wikipedia_links"],
-    },
-    "calgary": {
-        "source_name": "Calgary Open Data Tree Inventory",
-        "loader": "load_calgary_data",
-        "enrichments": ["tree_condition", "wikipedia_links"],
-    },
-    "waterloo": {
-        "source_name": "Waterloo Open Data Tree Inventory",
-        "loader": "load_waterloo_data",
-        "enrichments": [],
-    },
-    "boston": {
-        "source_name": "Boston Open Data Tree Inventory",
-        "loader": "load_boston_data",
-        "enrichments": [],
-    },
-    "markham": {
-        "source_name": "Markham Open Data Street Trees",
-        "loader": "load_markham_data",
-        "enrichments": [],
-    },
-    "oakville": {
-        "source_name": "Oakville Parks Tree Forestry",
-        "loader": "load_oakville_data",
-        "enrichments": [],
-    },
-    "peterborough": {
-        "source_name": "Peterborough Open Data Tree Inventory",
-        "loader": "load_peterborough_data",
-        "enrichments": [],
-    },
-    "mississauga": {
-        "source_name": "Mississauga City-Owned Tree Inventory",
-        "loader": "load_mississauga_data",
-        "enrichments": [],
-    },
-    "san_francisco": {
-        "source_name": "San Francisco Street Tree Inventory",
-        "loader": "load_san_francisco_data",
-        "enrichments": ["wikipedia_links"],
-    },
-    "madison_wi": {
-        "source_name": "Madison Urban Forestry Street Trees",
-        "loader": "load_madison_data",
-        "enrichments": ["wikipedia_links"],
-    },
-    "geneva": {
-        "source_name": "Geneva Cantonal Tree Inventory",
-        "loader": "load_geneva_data",
-        "enrichments": ["wikipedia_links"],
-    },
-}
+# Transaction-scoped bulk-load settings; they revert on commit or rollback.
+IMPORT_SESSION_SETTINGS_SQL = """
+SET LOCAL synchronous_commit = off;
+SET LOCAL work_mem = '256MB';
+SET LOCAL maintenance_work_mem = '1GB';
+SET LOCAL temp_buffers = '256MB';
+SET LOCAL statement_timeout = 0;
+"""
+
+
+def tune_import_session(cursor):
+    """Apply bulk-load settings to the current import transaction."""
+    cursor.execute(IMPORT_SESSION_SETTINGS_SQL)
+
+
+@contextmanager
+def import_session(conn):
+    """Run one import in a single transaction, committing only if it succeeds."""
+    conn.autocommit = False
+    cursor = conn.cursor()
+    try:
+        yield cursor
+    except Exception:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        cursor.close()
 
 
 def connect_db():
@@ -160,6 +142,73 @@ def ensure_street_tree_species_columns(cursor):
         """)
 
 
+def ensure_street_tree_geography_column(cursor):
+    """Create the stored geography column used by /nearest KNN lookups."""
+    if not table_column_exists(cursor, "street_trees", "geog"):
+        cursor.execute("""
+        ALTER TABLE street_trees
+            ADD COLUMN geog GEOGRAPHY(MultiPoint, 4326)
+            GENERATED ALWAYS AS (geom::geography) STORED;
+        """)
+    cursor.execute("SELECT to_regclass('public.idx_street_trees_geog_gist');")
+    if cursor.fetchone()[0] is None:
+        cursor.execute("""
+        CREATE INDEX idx_street_trees_geog_gist
+        ON street_trees USING GIST (geog);
+        """)
+
+
+def ensure_street_tree_source_geog_index(cursor):
+    """Create the per-source KNN index, enabling btree_gist for the text column."""
+    cursor.execute("SELECT to_regclass('public.idx_street_trees_source_geog_gist');")
+    if cursor.fetchone()[0] is None:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist;")
+        cursor.execute("""
+        CREATE INDEX idx_street_trees_source_geog_gist
+        ON street_trees USING GIST (source, geog);
+        """)
+
+
+STREET_TREE_CONFLICT_KEY_SQL = """
+SELECT EXISTS (
+    SELECT 1
+    FROM pg_index AS idx
+    WHERE idx.indrelid = 'street_trees'::regclass
+        AND idx.indisunique
+        AND idx.indisvalid
+        AND idx.indpred IS NULL
+        AND idx.indexprs IS NULL
+        AND idx.indnatts = 2
+        AND (
+            SELECT array_agg(attname::text ORDER BY attname::text)
+            FROM pg_attribute
+            WHERE attrelid = idx.indrelid AND attnum = ANY (idx.indkey)
+        ) = ARRAY['objectid', 'source']
+);
+"""
+DUPLICATE_STREET_TREE_KEYS_SQL = """
+SELECT COUNT(*)
+FROM (
+    SELECT 1 FROM street_trees GROUP BY source, objectid HAVING COUNT(*) > 1
+) AS duplicate_keys;
+"""
+
+
+def check_street_tree_conflict_key(cursor):
+    """Warn when no unique index on (source, objectid) backs the staged INSERTs' ON CONFLICT."""
+    cursor.execute(STREET_TREE_CONFLICT_KEY_SQL)
+    if cursor.fetchone()[0]:
+        return True
+    cursor.execute(DUPLICATE_STREET_TREE_KEYS_SQL)
+    duplicate_count = cursor.fetchone()[0]
+    print(
+        "Warning: street_trees has no unique index on (source, objectid), so imports will "
+        f"fail at ON CONFLICT. {duplicate_count} keys are duplicated; resolve them, then add "
+        "the unique_source_objectid constraint."
+    )
+    return False
+
+
 def ensure_species_tables(cursor):
     """Create normalized species catalog tables if they do not already exist."""
     cursor.execute("SELECT to_regclass('public.species');")
@@ -334,15 +383,22 @@ def seed_species_catalog(cursor):
     )
 
 
+DELETE_CITY_ROWS_SQL = "DELETE FROM street_trees WHERE source = %s;"
+
+
 def delete_city_rows(cursor, source_name):
     """Delete all rows for one city source before a refresh load."""
-    cursor.execute("DELETE FROM street_trees WHERE source = %s;", (source_name,))
+    cursor.execute(DELETE_CITY_ROWS_SQL, (source_name,))
 
 
-def count_city_rows(cursor, source_name):
-    """Return total rows currently stored for the source."""
-    cursor.execute("SELECT COUNT(*) FROM street_trees WHERE source = %s;", (source_name,))
-    return cursor.fetchone()[0]
+RECORD_IMPORT_RUN_SQL = """
+INSERT INTO import_runs (
+    city, source_name, source_file, refresh_mode, row_count, status,
+    error_message, started_at, finished_at
+) VALUES (
+    %s, %s, %s, %s, %s, %s, %s, %s, clock_timestamp()
+);
+"""
 
 
 def record_import_run(
@@ -355,19 +411,11 @@ def record_import_run(
     row_count,
     status,
     started_at,
-    finished_at,
     error_message=None,
 ):
-    """Insert one import audit row."""
+    """Insert one import audit row, stamping finished_at on the server."""
     cursor.execute(
-        """
-        INSERT INTO import_runs (
-            city, source_name, source_file, refresh_mode, row_count, status,
-            error_message, started_at, finished_at
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s
-        );
-        """,
+        RECORD_IMPORT_RUN_SQL,
         (
             city,
             source_name,
@@ -377,19 +425,39 @@ def record_import_run(
             status,
             error_message,
             started_at,
-            finished_at,
         ),
     )
 
 
-def log_failed_import(city, city_config, filename, refresh_mode, started_at, error_message):
-    """Persist failure metadata after the main transaction rolls back."""
-    failure_conn = connect_db()
-    try:
-        failure_cursor = failure_conn.cursor()
-        ensure_import_runs_table(failure_cursor)
+RECORD_COMPLETED_IMPORT_RUN_SQL = """
+INSERT INTO import_runs (
+    city, source_name, source_file, refresh_mode, row_count, status,
+    error_message, started_at, finished_at
+)
+SELECT
+    %s, %s, %s, %s, (SELECT COUNT(*) FROM street_trees WHERE source = %s), 'completed',
+    NULL, %s, clock_timestamp()
+RETURNING row_count;
+"""
+
+
+def record_completed_import_run(
+    cursor, *, city, source_name, source_file, refresh_mode, started_at
+):
+    """Insert a completed import audit row, counting the source's rows in the same statement."""
+    cursor.execute(
+        RECORD_COMPLETED_IMPORT_RUN_SQL,
+        (city, source_name, source_file, refresh_mode, source_name, started_at),
+    )
+    return cursor.fetchone()[0]
+
+
+def log_failed_import(conn, city, city_config, filename, refresh_mode, started_at, error_message):
+    """Persist failure metadata on the import connection after its transaction rolls back."""
+    with import_session(conn) as cursor:
+        ensure_import_runs_table(cursor)
         record_import_run(
-            failure_cursor,
+            cursor,
             city=city,
             source_name=city_config["source_name"],
             source_file=str(Path(filename).resolve()),
@@ -398,18 +466,12 @@ def log_failed_import(city, city_config, filename, refresh_mode, started_at, err
             status="failed",
             error_message=error_message,
             started_at=started_at,
-            finished_at=datetime.now(timezone.utc),
         )
-        failure_conn.commit()
-        failure_cursor.close()
-    finally:
-        failure_conn.close()
 
 
 def load_city_data(cursor, city, city_config, filename, batch_size):
     """Dispatch to the configured city loader."""
-    loader = globals()[city_config["loader"]]
-    loader(cursor, filename, batch_size=batch_size)
+    city_config["loader"](cursor, filename, batch_size=batch_size)
 
 
 def apply_species_catalog_to_source(cursor, source_name):
@@ -461,6 +523,7 @@ def apply_species_catalog_to_source(cursor, source_name):
         ) VALUES %s;
         """,
         resolution_rows,
+        page_size=DEFAULT_BATCH_SIZE,
     )
     cursor.execute(
         """
@@ -483,242 +546,310 @@ def apply_species_catalog_to_source(cursor, source_name):
     return updated_count
 
 
-def point_to_multipoint_json(geometry):
-    """Normalize Point geometries to the MultiPoint schema shape."""
-    normalized = geometry
-    if normalized and normalized.get("type") == "Point":
-        normalized = {
-            "type": "MultiPoint",
-            "coordinates": [normalized.get("coordinates")],
-        }
-    return json.dumps(normalized)
+def iter_features(filename):
+    """Yield features from a GeoJSON, GeoJSONSeq or ArcGIS JSON file without loading it whole."""
+    with open(filename, "rb") as file:
+        if Path(filename).suffix.lower() in LINE_DELIMITED_SUFFIXES or file.peek(1)[:1] == b"\x1e":
+            for line in file:
+                # RFC 8142 GeoJSON text sequences prefix each record with an RS byte.
+                line = line.strip(b"\x1e \t\r\n")
+                if line:
+                    yield orjson.loads(line)
+        else:
+            yield from ijson.items(file, "features.item", use_float=True)
 
 
-def load_toronto_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Toronto data using batched inserts."""
-    with open(filename, "r") as file:
-        data = json.load(file)
+def properties_getter(*names):
+    """Return a one-call multi-key getter that yields None for any missing key."""
+    getter = operator.itemgetter(*names)
+
+    def get(properties):
+        try:
+            return getter(properties)
+        except KeyError:
+            return tuple(map(properties.get, names))
+
+    return get
+
 
-    sql_query = """
+def point_geometry_values(geometry):
+    """Return (lon, lat, None) for a single point, else (None, None, hex EWKB)."""
+    if geometry is not None:
+        coordinates = geometry["coordinates"]
+        if geometry["type"] == "Point":
+            return coordinates[0], coordinates[1], None
+        if geometry["type"] == "MultiPoint" and len(coordinates) == 1:
+            return coordinates[0][0], coordinates[0][1], None
+    return None, None, multipoint_ewkb_hex(geometry)
+
+
+def multipoint_ewkb_hex(geometry):
+    """Encode a Point or MultiPoint geometry as hex EWKB MultiPoint in SRID 4326."""
+    if geometry is None:
+        return None
+    if geometry["type"] == "Point":
+        points = (geometry["coordinates"],)
+    elif geometry["type"] == "MultiPoint":
+        points = geometry["coordinates"]
+    else:
+        raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+    # PostGIS parses hex EWKB far faster than GeoJSON text; Z values are dropped.
+    ewkb = EWKB_MULTIPOINT_HEADER.pack(1, EWKB_MULTIPOINT_SRID_TYPE, 4326, len(points))
+    return (ewkb + b"".join(EWKB_POINT.pack(1, 1, x, y) for x, y, *_ in points)).hex()
+
+
+def load_toronto_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
+    """Load Toronto data by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "structid", "address", "streetname", "crossstreet1",
+        "crossstreet2", "suffix", "unit_number", "tree_position_number", "site", "ward",
+        "botanical_name", "common_name", "original_common_name", "species_key", "dbh_trunk",
+        "longitude", "latitude", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
         source, objectid, structid, address, streetname, crossstreet1, crossstreet2, suffix,
         unit_number, tree_position_number, site, ward, botanical_name, common_name,
         original_common_name, species_id, dbh_trunk, geom
-    ) VALUES %s
+    )
+    SELECT
+        source, objectid::numeric::integer, structid, address, streetname, crossstreet1,
+        crossstreet2, suffix, unit_number, tree_position_number::numeric::integer, site, ward,
+        botanical_name, common_name, original_common_name, species.id,
+        dbh_trunk::numeric::integer,
+        COALESCE(
+            geom_ewkb::geometry,
+            ST_Multi(ST_SetSRID(ST_MakePoint(longitude::float8, latitude::float8), 4326))
+        )
+    FROM street_trees_stage LEFT JOIN species USING (species_key)
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-    (SELECT id FROM species WHERE species_key = %s),
-    %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
-
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        rows.append(toronto_row_tuple(feature))
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Toronto features...")
-
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+    create_stage_table(cursor, stage_columns)
+
+    records = with_progress(iter_features(filename), "Toronto features")
+    copy_rows(cursor, stage_columns, map(toronto_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
+
+
+TORONTO_FIELDS = properties_getter(
+    "OBJECTID",
+    "STRUCTID",
+    "ADDRESS",
+    "STREETNAME",
+    "CROSSSTREET1",
+    "CROSSSTREET2",
+    "SUFFIX",
+    "UNIT_NUMBER",
+    "TREE_POSITION_NUMBER",
+    "SITE",
+    "WARD",
+    "BOTANICAL_NAME",
+    "COMMON_NAME",
+    "DBH_TRUNK",
+)
 
 
 def toronto_row_tuple(feature):
     """Build one Toronto insert row."""
     source = "Toronto Open Data Street Trees"
-    properties = feature["properties"]
-    botanical_name = properties.get("BOTANICAL_NAME")
+    (
+        objectid,
+        structid,
+        address,
+        streetname,
+        crossstreet1,
+        crossstreet2,
+        suffix,
+        unit_number,
+        tree_position_number,
+        site,
+        ward,
+        botanical_name,
+        source_common_name,
+        dbh_trunk,
+    ) = TORONTO_FIELDS(feature["properties"])
+    if objectid in (None, ""):
+        return
     common_name, original_common_name, species_key = resolved_species_values(
-        properties.get("COMMON_NAME"), botanical_name, source
+        source_common_name, botanical_name, source
     )
     return (
         source,
-        properties.get("OBJECTID"),
-        properties.get("STRUCTID"),
-        properties.get("ADDRESS"),
-        properties.get("STREETNAME"),
-        properties.get("CROSSSTREET1"),
-        properties.get("CROSSSTREET2"),
-        properties.get("SUFFIX"),
-        properties.get("UNIT_NUMBER"),
-        properties.get("TREE_POSITION_NUMBER"),
-        properties.get("SITE"),
-        properties.get("WARD"),
+        objectid,
+        structid,
+        address,
+        streetname,
+        crossstreet1,
+        crossstreet2,
+        suffix,
+        unit_number,
+        tree_position_number,
+        site,
+        ward,
         botanical_name,
         common_name,
         original_common_name,
         species_key,
-        properties.get("DBH_TRUNK"),
-        point_to_multipoint_json(feature["geometry"]),
+        dbh_trunk,
+        *point_geometry_values(feature["geometry"]),
     )
 
 
 def load_ottawa_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Ottawa data using batched inserts."""
-    with open(filename, "r") as file:
-        data = json.load(file)
-
-    sql_query = """
+    """Load Ottawa data by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "address", "streetname", "botanical_name", "common_name",
+        "original_common_name", "dbh_trunk", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
         source, objectid, address, streetname, botanical_name, common_name,
         original_common_name, dbh_trunk, geom
-    ) VALUES %s
+    )
+    SELECT
+        source, objectid::numeric::integer, address, streetname, botanical_name, common_name,
+        original_common_name, dbh_trunk::numeric::integer,
+        geom_ewkb::geometry
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
+    create_stage_table(cursor, stage_columns)
 
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        rows.append(ottawa_row_tuple(feature))
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Ottawa features...")
+    records = with_progress(iter_features(filename), "Ottawa features")
+    copy_rows(cursor, stage_columns, map(ottawa_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+
+OTTAWA_FIELDS = properties_getter("OBJECTID", "ADDNUM", "ADDSTR", "SPECIES", "DBH")
 
 
 def ottawa_row_tuple(feature):
     """Build one Ottawa insert row."""
     source = "Ottawa Open Data Tree Inventory"
-    properties = feature["properties"]
-    species = properties.get("SPECIES")
+    objectid, address, streetname, species, dbh_trunk = OTTAWA_FIELDS(feature["properties"])
+    if objectid in (None, ""):
+        return
     common_name, original_common_name = common_name_values(species, species)
     return (
         source,
-        properties.get("OBJECTID"),
-        properties.get("ADDNUM"),
-        properties.get("ADDSTR"),
+        objectid,
+        address,
+        streetname,
         species,
         common_name,
         original_common_name,
-        properties.get("DBH"),
-        point_to_multipoint_json(feature["geometry"]),
+        dbh_trunk,
+        multipoint_ewkb_hex(feature["geometry"]),
     )
 
 
 def load_montreal_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Montreal data using batched inserts."""
-    import csv
-
-    sql_query = """
+    """Load Montreal data by copying the CSV verbatim and transforming it in SQL."""
+    source_common_name_sql = "format('%s (%s)', essence_fr, essence_ang)"
+    botanical_name_sql = "essence_latin"
+    insert_sql = f"""
     INSERT INTO street_trees (
         source, objectid, ward, streetname, site, botanical_name, common_name,
         original_common_name, dbh_trunk, geom
-    ) VALUES %s
+    )
+    SELECT
+        'Montreal Open Data Tree Inventory', emp_no::numeric::integer, arrond_nom, localisation,
+        emplacement, essence_latin, names.common_name, names.original_common_name,
+        round(NULLIF(dhp, '')::float8)::integer,
+        ST_SetSRID(ST_Point(longitude::float8, latitude::float8), 4326)
+    FROM street_trees_stage
+    LEFT JOIN street_trees_stage_names AS names
+        ON names.source_common_name = {source_common_name_sql}
+        AND names.botanical_name = COALESCE({botanical_name_sql}, '')
+    WHERE NULLIF(longitude, '') IS NOT NULL AND NULLIF(latitude, '') IS NOT NULL
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_Point(%s, %s), 4326))
-    """
-
-    rows = []
-    with open(filename, "r") as file:
-        reader = csv.DictReader(file)
-        for idx, row in enumerate(reader, start=1):
-            row_tuple = montreal_row_tuple(row)
-            if row_tuple is None:
-                continue
-            rows.append(row_tuple)
-            if len(rows) >= batch_size:
-                _flush_batch(cursor, sql_query, rows, template, batch_size)
-            if idx % PROGRESS_INTERVAL == 0:
-                print(f"Processed {idx} Montreal rows...")
-
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
-
-
-def montreal_row_tuple(row):
-    """Build one Montreal insert row."""
-    source = "Montreal Open Data Tree Inventory"
-    if row["DHP"]:
-        dbh = round(float(row['DHP']))
-    else:
-        dbh = None
-    longitude = row["Longitude"]
-    latitude = row["Latitude"]
-    if not longitude or not latitude:
-        return
-    botanical_name = row["Essence_latin"]
-    source_common_name = f"{row['Essence_fr']} ({row['ESSENCE_ANG']})"
-    common_name, original_common_name = common_name_values(source_common_name, botanical_name)
-    return (
-        source,
-        row["EMP_NO"],
-        f"{row['ARROND_NOM']}",
-        row["LOCALISATION"],
-        row["Emplacement"],
-        botanical_name,
-        common_name,
-        original_common_name,
-        dbh,
-        longitude,
-        latitude,
-    )
+    copy_csv_to_stage(cursor, filename)
+    stage_common_names(cursor, source_common_name_sql, botanical_name_sql)
+    insert_staged_rows(cursor, insert_sql)
 
 
 def load_calgary_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Calgary data using batched inserts."""
-    import csv
-
-    sql_query = """
+    """Load Calgary data by copying the CSV verbatim and transforming it in SQL."""
+    # Blank parts are skipped but the rest join unstripped, as the old row builder did.
+    botanical_parts_sql = ", ".join(
+        f"CASE WHEN btrim({column}, {STRIP_CHARACTERS_SQL}) <> '' THEN {column} END"
+        for column in ("genus", "species", "cultivar")
+    )
+    botanical_name_sql = (
+        f"NULLIF(btrim(concat_ws(' ', {botanical_parts_sql}), {STRIP_CHARACTERS_SQL}), '')"
+    )
+    # "<letters>-<digits>" keeps the trailing number; anything else keeps every digit.
+    objectid_sql = """
+        CASE
+            WHEN wam_id ~ '^[[:alpha:]]*-?[0-9]+$' THEN substring(wam_id FROM '[0-9]+$')
+            ELSE COALESCE(
+                NULLIF(regexp_replace(wam_id, '[^0-9]+', '', 'g'), ''),
+                NULLIF(regexp_replace(tree_asset_cd, '[^0-9]+', '', 'g'), '')
+            )
+        END"""
+    insert_sql = f"""
     INSERT INTO street_trees (
         source, objectid, structid, common_name, original_common_name, botanical_name,
         dbh_trunk, address, streetname, site, geom
-    ) VALUES %s
+    )
+    SELECT
+        'Calgary Open Data Tree Inventory',
+        ({objectid_sql})::numeric::integer,
+        tree_asset_cd, names.common_name, names.original_common_name,
+        {botanical_name_sql},
+        CASE
+            WHEN dbh_cm ~ '{DECIMAL_TEXT_PATTERN}' THEN round(dbh_cm::float8)::integer
+        END,
+        location_detail, comm_code, COALESCE(NULLIF(asset_subtype, ''), asset_type),
+        ST_GeomFromText(point, 4326)
+    FROM street_trees_stage AS stage
+    LEFT JOIN street_trees_stage_names AS names
+        ON names.source_common_name = COALESCE(stage.common_name, '')
+        AND names.botanical_name = COALESCE({botanical_name_sql}, '')
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, ST_GeomFromText(%s, 4326))
-    """
-
-    rows = []
-    with open(filename, "r") as file:
-        reader = csv.DictReader(file)
-        for idx, row in enumerate(reader, start=1):
-            rows.append(calgary_row_tuple(row))
-            if len(rows) >= batch_size:
-                _flush_batch(cursor, sql_query, rows, template, batch_size)
-            if idx % PROGRESS_INTERVAL == 0:
-                print(f"Processed {idx} Calgary rows...")
-
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
-
-
-def calgary_row_tuple(row):
-    """Build one Calgary insert row using only columns present in the shared schema."""
-    species_parts = [row.get("GENUS"), row.get("SPECIES"), row.get("CULTIVAR")]
-    botanical_name = " ".join(part for part in species_parts if part and part.strip()).strip()
-    wam_id = row.get("WAM_ID", "")
-    objectid = "".join(ch for ch in wam_id if ch.isdigit())
-    if not objectid:
-        objectid = "".join(ch for ch in row.get("TREE_ASSET_CD", "") if ch.isdigit())
-    if not objectid:
-        raise ValueError(f"Calgary row is missing a numeric identifier: {row.get('TREE_ASSET_CD')}")
-    common_name, original_common_name = common_name_values(row.get("COMMON_NAME"), botanical_name)
-    dbh_raw = row.get("DBH_CM")
-    dbh_trunk = None
-    if dbh_raw not in (None, ""):
-        try:
-            dbh_trunk = round(float(dbh_raw))
-        except (TypeError, ValueError):
-            dbh_trunk = None
-    return (
-        "Calgary Open Data Tree Inventory",
-        int(objectid),
-        row.get("TREE_ASSET_CD"),
-        common_name,
-        original_common_name,
-        botanical_name or None,
-        dbh_trunk,
-        row.get("LOCATION_DETAIL"),
-        row.get("COMM_CODE"),
-        row.get("ASSET_SUBTYPE") or row.get("ASSET_TYPE"),
-        row["POINT"],
+    copy_csv_to_stage(cursor, filename)
+    cursor.execute(
+        f"SELECT tree_asset_cd FROM street_trees_stage WHERE ({objectid_sql}) IS NULL LIMIT 1;"
     )
+    missing_id_row = cursor.fetchone()
+    if missing_id_row is not None:
+        raise ValueError(f"Calgary row is missing a numeric identifier: {missing_id_row[0]}")
+    stage_common_names(cursor, "common_name", botanical_name_sql)
+    insert_staged_rows(cursor, insert_sql)
+
+
+STREET_TREE_SECONDARY_INDEXES_SQL = """
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE schemaname = 'public'
+  AND tablename = 'street_trees'
+  AND indexname NOT IN (
+      SELECT conname FROM pg_constraint WHERE conrelid = 'public.street_trees'::regclass
+  )
+ORDER BY indexname;
+"""
+
+
+def drop_street_tree_indexes(cursor):
+    """Drop street_trees indexes not backing a constraint and return their definitions."""
+    cursor.execute(STREET_TREE_SECONDARY_INDEXES_SQL)
+    index_definitions = cursor.fetchall()
+    for index_name, _definition in index_definitions:
+        cursor.execute(f'DROP INDEX IF EXISTS public."{index_name}";')
+    return index_definitions
+
+
+def recreate_street_tree_indexes(cursor, index_definitions):
+    """Rebuild indexes previously removed by drop_street_tree_indexes."""
+    for _index_name, definition in index_definitions:
+        cursor.execute(f"{definition};")
+
+
+def cluster_street_trees(cursor):
+    """Reorder the street_trees heap so spatial neighbours share pages."""
+    cursor.execute("CLUSTER street_trees USING idx_street_trees_geog_gist;")
 
 
 def enrich_data(cursor, city_config):
@@ -742,113 +873,206 @@ def enrich_data(cursor, city_config):
 
 
 def load_waterloo_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Waterloo data using batched inserts."""
-    with open(filename, "r") as file:
-        data = json.load(file)
-
-    sql_query = """
+    """Load Waterloo data by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "common_name", "original_common_name", "botanical_name",
+        "address", "dbh_trunk", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
-        source, objectid, common_name, original_common_name, botanical_name, address,
-        dbh_trunk, geom
-    ) VALUES %s
+        source, objectid, common_name, original_common_name, botanical_name, address, dbh_trunk,
+        geom
+    )
+    SELECT
+        source, objectid::numeric::integer, common_name, original_common_name, botanical_name,
+        address, dbh_trunk::numeric::integer, geom_ewkb::geometry
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
+    create_stage_table(cursor, stage_columns)
 
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        rows.append(waterloo_row_tuple(feature))
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Waterloo features...")
+    records = with_progress(iter_features(filename), "Waterloo features")
+    copy_rows(cursor, stage_columns, map(waterloo_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+
+WATERLOO_FIELDS = properties_getter("ASSET_ID", "COM_NAME", "LATIN_NAME", "ADDRESS", "DBH_CM")
 
 
 def waterloo_row_tuple(feature):
     """Build one Waterloo insert row."""
     source = "Waterloo Open Data Tree Inventory"
-    properties = feature["properties"]
-    dbh_trunk = properties.get("DBH_CM")
+    objectid, source_common_name, botanical_name, address, dbh_trunk = WATERLOO_FIELDS(
+        feature["properties"]
+    )
+    if objectid in (None, ""):
+        return
     if dbh_trunk == "null":
         dbh_trunk = None
-    common_name, original_common_name = common_name_values(
-        properties.get("COM_NAME"), properties.get("LATIN_NAME")
-    )
+    common_name, original_common_name = common_name_values(source_common_name, botanical_name)
     return (
         source,
-        properties.get("ASSET_ID"),
+        objectid,
         common_name,
         original_common_name,
-        properties.get("LATIN_NAME"),
-        properties.get("ADDRESS"),
+        botanical_name,
+        address,
         dbh_trunk,
-        point_to_multipoint_json(feature["geometry"]),
+        multipoint_ewkb_hex(feature["geometry"]),
     )
 
 
-def _flush_batch(cursor, sql_query, rows, template, batch_size):
-    """Insert buffered rows using batched VALUES clauses."""
-    if not rows:
-        return
-    execute_values(cursor, sql_query, rows, template=template, page_size=batch_size)
-    rows.clear()
+def create_stage_table(cursor, stage_columns):
+    """Create the text-only temporary table that COPY batches are streamed into."""
+    column_sql = ", ".join(f"{column} TEXT" for column in stage_columns)
+    cursor.execute("DROP TABLE IF EXISTS street_trees_stage;")
+    cursor.execute(f"CREATE TEMP TABLE street_trees_stage ({column_sql}) ON COMMIT DROP;")
 
 
-def load_boston_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Boston data and insert it into the database."""
-    with open(filename, "r") as file:
-        data = json.load(file)
+def copy_text_value(value):
+    """Encode one value for PostgreSQL COPY text format."""
+    if value is None:
+        return "\\N"
+    return str(value).translate(COPY_TEXT_ESCAPES)
+
+
+class CopyRowReader:
+    """File-like reader that encodes row tuples as COPY text one batch per read."""
+
+    __slots__ = ("rows", "batch_size")
+
+    def __init__(self, rows, batch_size=DEFAULT_BATCH_SIZE):
+        self.rows = rows
+        self.batch_size = batch_size
+
+    def read(self, size=-1):
+        return "".join(
+            "\t".join(map(copy_text_value, row)) + "\n"
+            for row in itertools.islice(self.rows, self.batch_size)
+        )
+
+
+def copy_rows(cursor, stage_columns, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream rows into the staging table with one COPY, skipping rows built as None."""
+    cursor.copy_expert(
+        f"COPY street_trees_stage ({', '.join(stage_columns)}) FROM STDIN;",
+        CopyRowReader(filter(None, rows), batch_size),
+    )
 
-    sql_query = """
+
+def with_progress(records, label):
+    """Yield records unchanged, printing a progress line every PROGRESS_INTERVAL."""
+    for idx, record in enumerate(records, start=1):
+        yield record
+        if idx % PROGRESS_INTERVAL == 0:
+            print(f"Processed {idx} {label}...")
+
+
+def insert_staged_rows(cursor, insert_sql):
+    """Move staged rows into street_trees in one statement and drop the stage."""
+    cursor.execute(insert_sql)
+    cursor.execute("DROP TABLE street_trees_stage;")
+
+
+def copy_csv_to_stage(cursor, filename):
+    """Copy a CSV file verbatim into a text stage table named after its header."""
+    with open(filename, "r", encoding="utf-8-sig", newline="") as file:
+        header = next(csv.reader([file.readline()]))
+        stage_columns = tuple(
+            '"{}"'.format(column.strip().lower().replace('"', '""')) for column in header
+        )
+        create_stage_table(cursor, stage_columns)
+        # Unlike csv.DictReader, COPY rejects rows with missing or extra fields, failing the
+        # import with the offending line number rather than loading a shifted row.
+        cursor.copy_expert("COPY street_trees_stage FROM STDIN WITH (FORMAT csv);", file)
+
+
+def stage_common_names(cursor, source_common_name_sql, botanical_name_sql):
+    """Resolve display common names once per distinct staged species pair."""
+    cursor.execute(
+        f"SELECT DISTINCT {source_common_name_sql}, {botanical_name_sql} FROM street_trees_stage;"
+    )
+    name_rows = [
+        (
+            source_common_name or "",
+            botanical_name or "",
+            *common_name_values(source_common_name, botanical_name),
+        )
+        for source_common_name, botanical_name in cursor.fetchall()
+    ]
+    cursor.execute("DROP TABLE IF EXISTS street_trees_stage_names;")
+    cursor.execute(
+        """
+        CREATE TEMP TABLE street_trees_stage_names (
+            source_common_name TEXT NOT NULL,
+            botanical_name TEXT NOT NULL,
+            common_name TEXT,
+            original_common_name TEXT,
+            PRIMARY KEY (source_common_name, botanical_name)
+        ) ON COMMIT DROP;
+        """
+    )
+    execute_values(
+        cursor,
+        """
+        INSERT INTO street_trees_stage_names (
+            source_common_name, botanical_name, common_name, original_common_name
+        ) VALUES %s;
+        """,
+        name_rows,
+        page_size=DEFAULT_BATCH_SIZE,
+    )
+
+
+def load_boston_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
+    """Load Boston data by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "address", "streetname", "suffix", "ward", "botanical_name",
+        "common_name", "original_common_name", "dbh_trunk", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
-        source, objectid, address, streetname, suffix, ward,
-        botanical_name, common_name, original_common_name, dbh_trunk, geom
-    ) VALUES %s
+        source, objectid, address, streetname, suffix, ward, botanical_name, common_name,
+        original_common_name, dbh_trunk, geom
+    )
+    SELECT
+        source, objectid::numeric::integer, address, streetname, suffix, ward, botanical_name,
+        common_name, original_common_name, dbh_trunk::numeric::integer,
+        geom_ewkb::geometry
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
+    create_stage_table(cursor, stage_columns)
+
+    records = with_progress(iter_features(filename), "Boston features")
+    copy_rows(cursor, stage_columns, map(boston_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        row = boston_row_tuple(feature)
-        rows.append(row)
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Boston features...")
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+BOSTON_FIELDS = properties_getter(
+    "OBJECTID", "address", "street", "suffix", "neighborhood", "spp_bot", "spp_com", "dbh"
+)
 
 
 def boston_row_tuple(feature):
     """Build one Boston insert row."""
     source = "Boston Open Data Tree Inventory"
-    properties = feature["properties"]
     geometry = feature["geometry"]
 
-    # Schema currently stores MultiPoint geometries.
-    if geometry and geometry.get("type") == "Point":
-        geometry = {
-            "type": "MultiPoint",
-            "coordinates": [geometry.get("coordinates")],
-        }
-
-    objectid = properties.get("OBJECTID")
-    address = str(properties.get("address") or "").strip() or None
-    streetname = properties.get("street")
-    suffix = properties.get("suffix")
-    ward = properties.get("neighborhood")
-    botanical_name = properties.get("spp_bot")
-    common_name, original_common_name = common_name_values(
-        properties.get("spp_com"), botanical_name
-    )
-    dbh_raw = properties.get("dbh")
+    (
+        objectid,
+        address,
+        streetname,
+        suffix,
+        ward,
+        botanical_name,
+        source_common_name,
+        dbh_raw,
+    ) = BOSTON_FIELDS(feature["properties"])
+    if objectid in (None, ""):
+        return
+    address = str(address or "").strip() or None
+    common_name, original_common_name = common_name_values(source_common_name, botanical_name)
     dbh_trunk = None
 
     if dbh_raw not in (None, "", "--"):
@@ -868,62 +1092,67 @@ def boston_row_tuple(feature):
         common_name,
         original_common_name,
         dbh_trunk,
-        json.dumps(geometry),
+        multipoint_ewkb_hex(geometry),
     )
 
 
 def load_markham_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Markham data and insert it into the database."""
-    with open(filename, "r") as file:
-        data = json.load(file)
-
-    sql_query = """
+    """Load Markham data by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "streetname", "crossstreet1", "crossstreet2", "site", "ward",
+        "botanical_name", "common_name", "original_common_name", "dbh_trunk", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
-        source, objectid, streetname, crossstreet1, crossstreet2, site, ward,
-        botanical_name, common_name, original_common_name, dbh_trunk, geom
-    ) VALUES %s
+        source, objectid, streetname, crossstreet1, crossstreet2, site, ward, botanical_name,
+        common_name, original_common_name, dbh_trunk, geom
+    )
+    SELECT
+        source, objectid::numeric::integer, streetname, crossstreet1, crossstreet2, site, ward,
+        botanical_name, common_name, original_common_name, dbh_trunk::numeric::integer,
+        geom_ewkb::geometry
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
+    create_stage_table(cursor, stage_columns)
+
+    records = with_progress(iter_features(filename), "Markham features")
+    copy_rows(cursor, stage_columns, map(markham_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        row = markham_row_tuple(feature)
-        rows.append(row)
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Markham features...")
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+MARKHAM_FIELDS = properties_getter(
+    "OBJECTID",
+    "ONSTREET",
+    "XSTREET1",
+    "XSTREET2",
+    "RDSECTYPE",
+    "MUNICIPALITY",
+    "SPECIES",
+    "COMMONNAME",
+    "CURRENTDBH",
+)
 
 
 def markham_row_tuple(feature):
     """Build one Markham insert row."""
     source = "Markham Open Data Street Trees"
-    properties = feature["properties"]
     geometry = feature["geometry"]
 
-    # Schema currently stores MultiPoint geometries.
-    if geometry and geometry.get("type") == "Point":
-        geometry = {
-            "type": "MultiPoint",
-            "coordinates": [geometry.get("coordinates")],
-        }
-
-    objectid = properties.get("OBJECTID")
-    streetname = properties.get("ONSTREET")
-    crossstreet1 = properties.get("XSTREET1")
-    crossstreet2 = properties.get("XSTREET2")
-    site = properties.get("RDSECTYPE")
-    ward = properties.get("MUNICIPALITY")
-    botanical_name = properties.get("SPECIES")
-    common_name, original_common_name = common_name_values(
-        properties.get("COMMONNAME"), botanical_name
-    )
-    dbh_raw = properties.get("CURRENTDBH")
+    (
+        objectid,
+        streetname,
+        crossstreet1,
+        crossstreet2,
+        site,
+        ward,
+        botanical_name,
+        source_common_name,
+        dbh_raw,
+    ) = MARKHAM_FIELDS(feature["properties"])
+    if objectid in (None, ""):
+        return
+    common_name, original_common_name = common_name_values(source_common_name, botanical_name)
     dbh_trunk = None
 
     if dbh_raw not in (None, "", "--"):
@@ -944,206 +1173,226 @@ def markham_row_tuple(feature):
         common_name,
         original_common_name,
         dbh_trunk,
-        json.dumps(geometry),
+        multipoint_ewkb_hex(geometry),
     )
 
 
 def load_oakville_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Oakville data and insert it into the database."""
-    with open(filename, "r") as file:
-        data = json.load(file)
-
-    sql_query = """
+    """Load Oakville data by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "street_number", "street_name", "cross_roads", "locsite",
+        "forestry_zone", "botanical_name", "common_name", "original_common_name", "dbh_trunk",
+        "geom_ewkb",
+    )
+    street_number, street_name, cross_roads, locsite, forestry_zone = (
+        f"NULLIF(btrim({column}, {STRIP_CHARACTERS_SQL}), '')"
+        for column in ("street_number", "street_name", "cross_roads", "locsite", "forestry_zone")
+    )
+    insert_sql = f"""
     INSERT INTO street_trees (
-        source, objectid, address, streetname, crossstreet1, site, ward,
-        botanical_name, common_name, original_common_name, dbh_trunk, geom
-    ) VALUES %s
+        source, objectid, address, streetname, crossstreet1, site, ward, botanical_name,
+        common_name, original_common_name, dbh_trunk, geom
+    )
+    SELECT
+        source, objectid::numeric::integer,
+        NULLIF(concat_ws(' ', {street_number}, {street_name}), ''),
+        {street_name}, {cross_roads}, {locsite}, {forestry_zone},
+        botanical_name, common_name, original_common_name,
+        dbh_trunk::numeric::integer, geom_ewkb::geometry
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
+    create_stage_table(cursor, stage_columns)
+
+    records = with_progress(iter_features(filename), "Oakville features")
+    copy_rows(cursor, stage_columns, map(oakville_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        row = oakville_row_tuple(feature)
-        rows.append(row)
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Oakville features...")
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+OAKVILLE_FIELDS = properties_getter(
+    "OBJECTID",
+    "STREET_NUMBER",
+    "STREET_NAME",
+    "CROSS_ROADS",
+    "LOCSITE",
+    "FORESTRY_ZONE",
+    "SPECIES",
+    "DBH",
+)
 
 
 def oakville_row_tuple(feature):
     """Build one Oakville insert row."""
     source = "Oakville Parks Tree Forestry"
-    properties = feature["properties"]
     geometry = feature["geometry"]
 
-    # Schema currently stores MultiPoint geometries.
-    if geometry and geometry.get("type") == "Point":
-        geometry = {
-            "type": "MultiPoint",
-            "coordinates": [geometry.get("coordinates")],
-        }
-
-    def clean_text(value):
-        if value is None:
-            return None
-        text = str(value).strip()
-        if not text:
-            return None
-        return text
-
-    objectid = properties.get("OBJECTID")
-    street_number = clean_text(properties.get("STREET_NUMBER"))
-    street_name = clean_text(properties.get("STREET_NAME"))
-    address = " ".join(part for part in [street_number, street_name] if part) or None
-    streetname = street_name
-    crossstreet1 = clean_text(properties.get("CROSS_ROADS"))
-    site = clean_text(properties.get("LOCSITE"))
-    ward = clean_text(properties.get("FORESTRY_ZONE"))
-    species = clean_text(properties.get("SPECIES"))
+    (
+        objectid,
+        street_number,
+        street_name,
+        cross_roads,
+        locsite,
+        forestry_zone,
+        species,
+        dbh_trunk,
+    ) = OAKVILLE_FIELDS(feature["properties"])
+    if objectid in (None, ""):
+        return
+    # Address parts are trimmed and joined in SQL; only species needs parsing here.
+    species = clean_text(species)
     common_name = species
     botanical_name = None
-    dbh_trunk = properties.get("DBH")
 
-    if species and " - " in species:
-        common_part, botanical_part = species.split(" - ", 1)
-        common_name = clean_text(common_part)
-        botanical_name = clean_text(botanical_part)
+    if species:
+        common_part, separator, botanical_part = species.partition(" - ")
+        if separator:
+            common_name = clean_text(common_part)
+            botanical_name = clean_text(botanical_part)
     common_name, original_common_name = common_name_values(common_name, botanical_name)
 
     return (
         source,
         objectid,
-        address,
-        streetname,
-        crossstreet1,
-        site,
-        ward,
+        street_number,
+        street_name,
+        cross_roads,
+        locsite,
+        forestry_zone,
         botanical_name,
         common_name,
         original_common_name,
         dbh_trunk,
-        json.dumps(geometry),
+        multipoint_ewkb_hex(geometry),
     )
 
 
 def load_peterborough_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Peterborough data and insert it into the database."""
-    with open(filename, "r") as file:
-        data = json.load(file)
-
-    sql_query = """
+    """Load Peterborough data by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "address", "streetname", "inventory_loc", "tree_location", "ward",
+        "botanical_name", "common_name", "original_common_name", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
-        source, objectid, address, streetname, site, ward,
-        botanical_name, common_name, original_common_name, geom
-    ) VALUES %s
+        source, objectid, address, streetname, site, ward, botanical_name, common_name,
+        original_common_name, geom
+    )
+    SELECT
+        source, objectid::numeric::integer, address, streetname,
+        COALESCE(NULLIF(inventory_loc, ''), tree_location), ward, botanical_name,
+        common_name, original_common_name, geom_ewkb::geometry
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
+    create_stage_table(cursor, stage_columns)
+
+    records = with_progress(iter_features(filename), "Peterborough features")
+    copy_rows(cursor, stage_columns, map(peterborough_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        row = peterborough_row_tuple(feature)
-        rows.append(row)
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Peterborough features...")
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+PETERBOROUGH_FIELDS = properties_getter(
+    "OBJECTID",
+    "ADDNUM",
+    "STREET",
+    "INVENTORY_LOC",
+    "TREE_LOCATION",
+    "ZONE",
+    "BOTANICAL",
+    "COMMON",
+)
 
 
 def peterborough_row_tuple(feature):
     """Build one Peterborough insert row."""
     source = "Peterborough Open Data Tree Inventory"
-    properties = feature["properties"]
     geometry = feature["geometry"]
 
-    # Schema currently stores MultiPoint geometries.
-    if geometry and geometry.get("type") == "Point":
-        geometry = {
-            "type": "MultiPoint",
-            "coordinates": [geometry.get("coordinates")],
-        }
-
-    address = properties.get("ADDNUM")
-    streetname = properties.get("STREET")
-    site = properties.get("INVENTORY_LOC") or properties.get("TREE_LOCATION")
-    ward = str(properties.get("ZONE")) if properties.get("ZONE") is not None else None
-    botanical_name = properties.get("BOTANICAL")
-    common_name, original_common_name = common_name_values(properties.get("COMMON"), botanical_name)
+    (
+        objectid,
+        address,
+        streetname,
+        inventory_location,
+        tree_location,
+        zone,
+        botanical_name,
+        source_common_name,
+    ) = PETERBOROUGH_FIELDS(feature["properties"])
+    if objectid in (None, ""):
+        return
+    common_name, original_common_name = common_name_values(source_common_name, botanical_name)
 
     return (
         source,
-        properties.get("OBJECTID"),
+        objectid,
         address,
         streetname,
-        site,
-        ward,
+        inventory_location,
+        tree_location,
+        zone,
         botanical_name,
         common_name,
         original_common_name,
-        json.dumps(geometry),
+        multipoint_ewkb_hex(geometry),
     )
 
 
 def load_mississauga_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Mississauga data and insert it into the database."""
-    with open(filename, "r") as file:
-        data = json.load(file)
-
-    sql_query = """
+    """Load Mississauga data by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "structid", "address", "site", "ward", "botanical_name",
+        "common_name", "original_common_name", "dbh_trunk", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
-        source, objectid, structid, address, site, ward,
-        botanical_name, common_name, original_common_name, dbh_trunk, geom
-    ) VALUES %s
+        source, objectid, structid, address, site, ward, botanical_name, common_name,
+        original_common_name, dbh_trunk, geom
+    )
+    SELECT
+        source, objectid::numeric::integer, structid, address, site, ward, botanical_name,
+        common_name, original_common_name, dbh_trunk::numeric::integer,
+        geom_ewkb::geometry
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
+    create_stage_table(cursor, stage_columns)
+
+    records = with_progress(iter_features(filename), "Mississauga features")
+    copy_rows(cursor, stage_columns, map(mississauga_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        row = mississauga_row_tuple(feature)
-        rows.append(row)
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Mississauga features...")
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+MISSISSAUGA_FIELDS = properties_getter(
+    "OBJECTID",
+    "UNITID",
+    "LOC",
+    "SPACETYPE",
+    "SERVSTAT",
+    "ZAREA",
+    "BOTDESC",
+    "BOTNAME",
+    "DIAM",
+)
 
 
 def mississauga_row_tuple(feature):
     """Build one Mississauga insert row."""
     source = "Mississauga City-Owned Tree Inventory"
-    properties = feature["properties"]
     geometry = feature["geometry"]
 
-    # Schema currently stores MultiPoint geometries.
-    if geometry and geometry.get("type") == "Point":
-        geometry = {
-            "type": "MultiPoint",
-            "coordinates": [geometry.get("coordinates")],
-        }
-
-    def clean_text(value):
-        if value is None:
-            return None
-        text = str(value).strip()
-        if not text:
-            return None
-        return text
-
-    diameter = properties.get("DIAM")
+    (
+        objectid,
+        unit_id,
+        location,
+        space_type,
+        service_status,
+        zone_area,
+        botanical_description,
+        botanical_code,
+        diameter,
+    ) = MISSISSAUGA_FIELDS(feature["properties"])
+    if objectid in (None, ""):
+        return
     dbh_trunk = None
     if diameter not in (None, ""):
         try:
@@ -1151,71 +1400,88 @@ def mississauga_row_tuple(feature):
         except (TypeError, ValueError):
             dbh_trunk = None
 
-    site_parts = [
-        clean_text(properties.get("LOC")),
-        clean_text(properties.get("SPACETYPE")),
-        clean_text(properties.get("SERVSTAT")),
-    ]
+    site_parts = [clean_text(location), clean_text(space_type), clean_text(service_status)]
     site = " | ".join(part for part in site_parts if part) or None
-    common_name = clean_text(properties.get("BOTDESC")) or clean_text(properties.get("BOTNAME"))
+    common_name = clean_text(botanical_description) or clean_text(botanical_code)
     if common_name:
         common_name = common_name.title()
     common_name, original_common_name = common_name_values(common_name)
 
     return (
         source,
-        properties.get("OBJECTID"),
-        clean_text(properties.get("UNITID")),
+        objectid,
+        clean_text(unit_id),
         None,
         site,
-        clean_text(properties.get("ZAREA")),
+        clean_text(zone_area),
         None,
         common_name,
         original_common_name,
         dbh_trunk,
-        json.dumps(geometry),
+        multipoint_ewkb_hex(geometry),
     )
 
 
 def load_san_francisco_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load San Francisco data using a CSV file."""
-    import csv
-
-    sql_query = """
+    """Load the San Francisco CSV by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "address", "site", "ward", "botanical_name", "common_name",
+        "original_common_name", "dbh_trunk", "tree_position_number", "longitude", "latitude",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
         source, objectid, address, site, ward, botanical_name, common_name,
         original_common_name, dbh_trunk, tree_position_number, geom
-    ) VALUES %s
+    )
+    SELECT
+        source, objectid::numeric::integer, address, site, ward, botanical_name, common_name,
+        original_common_name, dbh_trunk::numeric::integer,
+        tree_position_number::numeric::integer,
+        ST_Multi(ST_SetSRID(ST_Point(longitude::float8, latitude::float8), 4326))
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-    ST_Multi(ST_SetSRID(ST_Point(%s, %s), 4326)))
-    """
+    create_stage_table(cursor, stage_columns)
 
-    rows = []
     with open(filename, "r", newline="", encoding="utf-8") as file:
-        reader = csv.DictReader(file)
-        for idx, row in enumerate(reader, start=1):
-            row_tuple = san_francisco_row_tuple(row)
-            if row_tuple is None:
-                continue
-            rows.append(row_tuple)
-            if len(rows) >= batch_size:
-                _flush_batch(cursor, sql_query, rows, template, batch_size)
-            if idx % PROGRESS_INTERVAL == 0:
-                print(f"Processed {idx} San Francisco rows...")
-
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
-
-
-def san_francisco_row_tuple(row):
-    """Build one San Francisco insert row."""
+        reader = csv.reader(file)
+        columns = san_francisco_columns(next(reader, []))
+        records = with_progress(map(columns, reader), "San Francisco rows")
+        copy_rows(cursor, stage_columns, map(san_francisco_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
+
+
+SAN_FRANCISCO_COLUMNS = (
+    "qaddress", "qsiteinfo", "qcaretaker", "qspecies", "dbh", "siteorder", "longitude", "latitude",
+)
+
+
+def san_francisco_columns(header):
+    """Return a getter for the San Francisco columns at their csv.reader positions."""
+    positions = {name.strip().lower(): index for index, name in enumerate(header)}
+    names = ("treeid" if "treeid" in positions else "tree_id", *SAN_FRANCISCO_COLUMNS)
+    missing = [name for name in names if name not in positions]
+    if missing:
+        raise ValueError(f"San Francisco CSV is missing columns: {', '.join(missing)}")
+    return operator.itemgetter(*(positions[name] for name in names))
+
+
+def san_francisco_row_tuple(values):
+    """Build one San Francisco insert row from san_francisco_columns values."""
     source = "San Francisco Street Tree Inventory"
-    properties = {k.lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
+    (
+        objectid,
+        address,
+        site_info,
+        caretaker,
+        raw_species,
+        dbh,
+        site_order,
+        longitude,
+        latitude,
+    ) = (value.strip() for value in values)
 
-    objectid = properties.get("treeid") or properties.get("tree_id")
-    if objectid in (None, ""):
+    if objectid == "":
         return
 
     try:
@@ -1231,21 +1497,20 @@ def san_francisco_row_tuple(row):
         except (TypeError, ValueError):
             return None
 
-    dbh = parse_float(properties.get("dbh"))
+    dbh = parse_float(dbh)
     dbh_trunk = None if dbh is None else round(dbh)
 
-    tree_position = parse_float(properties.get("siteorder"))
+    tree_position = parse_float(site_order)
     if tree_position is None:
         tree_position = None
     else:
         tree_position = int(tree_position)
 
-    longitude = parse_float(properties.get("longitude"))
-    latitude = parse_float(properties.get("latitude"))
+    longitude = parse_float(longitude)
+    latitude = parse_float(latitude)
     if longitude is None or latitude is None:
         return
 
-    raw_species = properties.get("qspecies")
     botanical_name, source_common_name = split_source_species_text(raw_species)
     if botanical_name is None and source_common_name is None:
         botanical_name = raw_species
@@ -1259,9 +1524,9 @@ def san_francisco_row_tuple(row):
     return (
         source,
         objectid,
-        properties.get("qaddress"),
-        properties.get("qsiteinfo"),
-        properties.get("qcaretaker"),
+        address,
+        site_info,
+        caretaker,
         botanical_name,
         common_name,
         original_common_name,
@@ -1273,137 +1538,130 @@ def san_francisco_row_tuple(row):
 
 
 def load_madison_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Madison Wisconsin tree inventory GeoJSON."""
-    with open(filename, "r") as file:
-        data = json.load(file)
-
-    sql_query = """
+    """Load Madison Wisconsin GeoJSON by streaming rows through COPY into the stage table."""
+    stage_columns = (
+        "source", "objectid", "site", "ward", "botanical_name", "common_name",
+        "original_common_name", "dbh_trunk", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
-        source, objectid, site, ward, botanical_name, common_name,
-        original_common_name, dbh_trunk, geom
-    ) VALUES %s
+        source, objectid, site, ward, botanical_name, common_name, original_common_name,
+        dbh_trunk, geom
+    )
+    SELECT
+        source, objectid::numeric::integer, site, ward, botanical_name, common_name,
+        original_common_name, dbh_trunk::numeric::integer,
+        geom_ewkb::geometry
+    FROM street_trees_stage
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
+    create_stage_table(cursor, stage_columns)
 
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        row = madison_row_tuple(feature)
-        if row is None:
-            continue
-        rows.append(row)
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Madison features...")
+    records = with_progress(iter_features(filename), "Madison features")
+    copy_rows(cursor, stage_columns, map(madison_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+
+MADISON_FIELDS = properties_getter(
+    "OBJECTID", "site_id", "STATUS", "SPP_BOT", "SPP_COM", "DIAMETER"
+)
 
 
 def madison_row_tuple(feature):
     """Build one Madison insert row."""
     source = "Madison Urban Forestry Street Trees"
-    properties = feature["properties"]
     geometry = feature["geometry"]
 
-    site = properties.get("site_id")
+    objectid, site, status, botanical_name, source_common_name, dbh_raw = MADISON_FIELDS(
+        feature["properties"]
+    )
+    if objectid in (None, ""):
+        return
     if site in (None, ""):
         site = None
 
-    dbh_raw = properties.get("DIAMETER")
     dbh_trunk = None
     if dbh_raw not in (None, ""):
         try:
             dbh_trunk = round(float(dbh_raw))
         except (TypeError, ValueError):
             dbh_trunk = None
-    common_name, original_common_name = common_name_values(
-        properties.get("SPP_COM"), properties.get("SPP_BOT")
-    )
+    common_name, original_common_name = common_name_values(source_common_name, botanical_name)
 
     return (
         source,
-        properties.get("OBJECTID"),
+        objectid,
         str(site) if site is not None else None,
-        properties.get("STATUS"),
-        properties.get("SPP_BOT"),
+        status,
+        botanical_name,
         common_name,
         original_common_name,
         dbh_trunk,
-        point_to_multipoint_json(geometry),
+        multipoint_ewkb_hex(geometry),
     )
 
 
 def load_geneva_data(cursor, filename, batch_size=DEFAULT_BATCH_SIZE):
-    """Load Geneva SITG tree inventory from ArcGIS JSON or GeoJSON."""
-    with open(filename, "r") as file:
-        data = json.load(file)
-
-    first_feature = next(iter(data.get("features", [])), None)
-    if first_feature and "attributes" in first_feature:
-        load_geneva_arcgis_json(cursor, data, batch_size)
+    """Load Geneva SITG ArcGIS JSON or GeoJSON by streaming rows through COPY into the stage."""
+    features = iter_features(filename)
+    first_feature = next(features, None)
+    if first_feature is None:
+        return
+    features = itertools.chain([first_feature], features)
+    if "attributes" in first_feature:
+        load_geneva_arcgis_json(cursor, features, batch_size)
     else:
-        load_geneva_geojson(cursor, data, batch_size)
+        load_geneva_geojson(cursor, features, batch_size)
 
 
-def load_geneva_geojson(cursor, data, batch_size):
+def load_geneva_geojson(cursor, features, batch_size):
     """Load Geneva GeoJSON features with WGS84 coordinates."""
-    sql_query = """
+    stage_columns = (
+        "source", "objectid", "structid", "address", "site", "ward", "botanical_name",
+        "common_name", "original_common_name", "species_key", "dbh_trunk", "geom_ewkb",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
         source, objectid, structid, address, site, ward, botanical_name, common_name,
         original_common_name, species_id, dbh_trunk, geom
-    ) VALUES %s
+    )
+    SELECT
+        source, objectid::numeric::integer, structid, address, site, ward, botanical_name,
+        common_name, original_common_name, species.id, dbh_trunk::numeric::integer,
+        geom_ewkb::geometry
+    FROM street_trees_stage LEFT JOIN species USING (species_key)
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s,
-    (SELECT id FROM species WHERE species_key = %s), %s,
-    ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-    """
-
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        row = geneva_geojson_row_tuple(feature)
-        if row is None:
-            continue
-        rows.append(row)
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Geneva features...")
+    create_stage_table(cursor, stage_columns)
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+    records = with_progress(features, "Geneva features")
+    copy_rows(cursor, stage_columns, map(geneva_geojson_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
 
-def load_geneva_arcgis_json(cursor, data, batch_size):
+def load_geneva_arcgis_json(cursor, features, batch_size):
     """Load Geneva ArcGIS JSON features with LV95 coordinates."""
-    sql_query = """
+    stage_columns = (
+        "source", "objectid", "structid", "address", "site", "ward", "botanical_name",
+        "common_name", "original_common_name", "species_key", "dbh_trunk", "x", "y",
+    )
+    insert_sql = """
     INSERT INTO street_trees (
         source, objectid, structid, address, site, ward, botanical_name, common_name,
         original_common_name, species_id, dbh_trunk, geom
-    ) VALUES %s
+    )
+    SELECT
+        source, objectid::numeric::integer, structid, address, site, ward, botanical_name,
+        common_name, original_common_name, species.id, dbh_trunk::numeric::integer,
+        ST_Multi(ST_Transform(ST_SetSRID(ST_Point(x::float8, y::float8), 2056), 4326))
+    FROM street_trees_stage LEFT JOIN species USING (species_key)
     ON CONFLICT (source, objectid) DO NOTHING;
     """
-    template = """
-    (%s, %s, %s, %s, %s, %s, %s, %s, %s,
-    (SELECT id FROM species WHERE species_key = %s), %s,
-    ST_Multi(ST_Transform(ST_SetSRID(ST_Point(%s, %s), 2056), 4326)))
-    """
-
-    rows = []
-    for idx, feature in enumerate(data["features"], start=1):
-        row = geneva_arcgis_json_row_tuple(feature)
-        if row is None:
-            continue
-        rows.append(row)
-        if len(rows) >= batch_size:
-            _flush_batch(cursor, sql_query, rows, template, batch_size)
-        if idx % PROGRESS_INTERVAL == 0:
-            print(f"Processed {idx} Geneva features...")
+    create_stage_table(cursor, stage_columns)
 
-    _flush_batch(cursor, sql_query, rows, template, batch_size)
+    records = with_progress(features, "Geneva features")
+    copy_rows(cursor, stage_columns, map(geneva_arcgis_json_row_tuple, records), batch_size)
+    insert_staged_rows(cursor, insert_sql)
 
 
 def geneva_geojson_row_tuple(feature):
@@ -1412,7 +1670,7 @@ def geneva_geojson_row_tuple(feature):
     shared = geneva_shared_values(properties)
     if shared is None:
         return
-    return (*shared, point_to_multipoint_json(feature["geometry"]))
+    return (*shared, multipoint_ewkb_hex(feature["geometry"]))
 
 
 def geneva_arcgis_json_row_tuple(feature):
@@ -1487,6 +1745,7 @@ def common_name_values(source_common_name, botanical_name=None):
     return display_name, original_common_name
 
 
+@lru_cache(maxsize=SPECIES_RESOLUTION_CACHE_SIZE)
 def resolved_species_values(source_common_name, botanical_name=None, source=None):
     """Return display name, source name, and catalog key when a species is known."""
     original_common_name = clean_text(source_common_name)
@@ -1577,6 +1836,8 @@ def load_species_catalog():
         else:
             raise ValueError(f"Unknown name_kind in alias seed: {row['name_kind']}")
 
+    # Resolutions cached against a previous catalog would go stale.
+    resolved_species_values.cache_clear()
     _SPECIES_CATALOG_CACHE = {
         "species_rows": species_rows,
         "alias_rows": alias_rows,
@@ -1776,98 +2037,289 @@ def parse_float(value):
         return None
 
 
+# Mappings for city-specific handlers, defined after the loaders they reference
+CITY_HANDLERS = {
+    "toronto": {
+        "source_name": "Toronto Open Data Street Trees",
+        "loader": load_toronto_data,
+        "enrichments": ["wikipedia_links", "human_readable_names"],
+    },
+    "ottawa": {
+        "source_name": "Ottawa Open Data Tree Inventory",
+        "loader": load_ottawa_data,
+        "enrichments": ["wikipedia_links"],
+    },
+    "montreal": {
+        "source_name": "Montreal Open Data Tree Inventory",
+        "loader": load_montreal_data,
+        "enrichments": ["wikipedia_links"],
+    },
+    "calgary": {
+        "source_name": "Calgary Open Data Tree Inventory",
+        "loader": load_calgary_data,
+        "enrichments": ["tree_condition", "wikipedia_links"],
+    },
+    "waterloo": {
+        "source_name": "Waterloo Open Data Tree Inventory",
+        "loader": load_waterloo_data,
+        "enrichments": [],
+    },
+    "boston": {
+        "source_name": "Boston Open Data Tree Inventory",
+        "loader": load_boston_data,
+        "enrichments": [],
+    },
+    "markham": {
+        "source_name": "Markham Open Data Street Trees",
+        "loader": load_markham_data,
+        "enrichments": [],
+    },
+    "oakville": {
+        "source_name": "Oakville Parks Tree Forestry",
+        "loader": load_oakville_data,
+        "enrichments": [],
+    },
+    "peterborough": {
+        "source_name": "Peterborough Open Data Tree Inventory",
+        "loader": load_peterborough_data,
+        "enrichments": [],
+    },
+    "mississauga": {
+        "source_name": "Mississauga City-Owned Tree Inventory",
+        "loader": load_mississauga_data,
+        "enrichments": [],
+    },
+    "san_francisco": {
+        "source_name": "San Francisco Street Tree Inventory",
+        "loader": load_san_francisco_data,
+        "enrichments": ["wikipedia_links"],
+    },
+    "madison_wi": {
+        "source_name": "Madison Urban Forestry Street Trees",
+        "loader": load_madison_data,
+        "enrichments": ["wikipedia_links"],
+    },
+    "geneva": {
+        "source_name": "Geneva Cantonal Tree Inventory",
+        "loader": load_geneva_data,
+        "enrichments": ["wikipedia_links"],
+    },
+}
+
+
+def prepare_schema(cursor):
+    """Create or upgrade the shared tables and seed the species catalog."""
+    ensure_import_runs_table(cursor)
+    ensure_species_tables(cursor)
+    ensure_species_enrichment_tables(cursor)
+    seed_species_catalog(cursor)
+    ensure_street_tree_species_columns(cursor)
+    ensure_street_tree_geography_column(cursor)
+    ensure_street_tree_source_geog_index(cursor)
+    check_street_tree_conflict_key(cursor)
+
+
+def import_city(
+    city,
+    filename,
+    refresh_mode=False,
+    apply_enrichments=False,
+    batch_size=DEFAULT_BATCH_SIZE,
+):
+    """Load one city on its own connection and record the run; return True on success."""
+    city_config = CITY_HANDLERS[city]
+    source_name = city_config["source_name"]
+    source_file = str(Path(filename).resolve())
+    started_at = datetime.now(timezone.utc)
+
+    conn = connect_db()
+    try:
+        with import_session(conn) as cursor:
+            # temp_buffers must be set before the stage tables are touched.
+            tune_import_session(cursor)
+            print(f"Loading data for {city}...")
+            if refresh_mode:
+                print(f"Refreshing existing rows for {source_name}...")
+                delete_city_rows(cursor, source_name)
+
+            load_city_data(cursor, city, city_config, filename, batch_size)
+            resolved_count = apply_species_catalog_to_source(cursor, source_name)
+            print(f"Applied species catalog to {resolved_count} {city} rows.")
+
+            if apply_enrichments:
+                print(f"Applying enrichments for {city}...")
+                enrich_data(cursor, city_config)
+
+            record_completed_import_run(
+                cursor,
+                city=city,
+                source_name=source_name,
+                source_file=source_file,
+                refresh_mode=refresh_mode,
+                started_at=started_at,
+            )
+        return True
+    except Exception as e:
+        print(f"An error occurred while importing {city}: {e}")
+        try:
+            log_failed_import(
+                conn, city, city_config, filename, refresh_mode, started_at, str(e)
+            )
+        except Exception as log_error:
+            print(f"Failed to write import_runs failure entry: {log_error}")
+        return False
+    finally:
+        conn.close()
+
+
+def import_cities(
+    cities,
+    filenames,
+    refresh_mode=False,
+    apply_enrichments=False,
+    batch_size=DEFAULT_BATCH_SIZE,
+    workers=None,
+):
+    """Import several cities, one worker process each; return per-city success flags."""
+    args = (
+        cities,
+        filenames,
+        itertools.repeat(refresh_mode),
+        itertools.repeat(apply_enrichments),
+        itertools.repeat(batch_size),
+    )
+    if len(cities) > 1 and workers != 1:
+        # Parsing is CPU-bound and each city touches only its own source rows. Spawned
+        # workers start clean, so they never inherit main()'s open libpq socket.
+        with ProcessPoolExecutor(
+            max_workers=workers or len(cities),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            return list(executor.map(import_city, *args))
+    return list(map(import_city, *args))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Tree Data Import and Enrichment CLI")
-    parser.add_argument("city", choices=CITY_HANDLERS.keys(), help="City to process")
+    parser.add_argument(
+        "cities",
+        nargs="+",
+        choices=CITY_HANDLERS.keys(),
+        metavar="city",
+        help="City or cities to process",
+    )
     parser.add_argument(
         "--file",
         help=(
-            "Path to the data file. If omitted, the loader uses the newest file under "
-            "data/raw/<city>/<YYYY-MM-DD>/."
+            "Path to the data file (single city only). If omitted, the loader uses "
+            "the newest file under data/raw/<city>/<YYYY-MM-DD>/."
         ),
     )
     parser.add_argument("--enrich", action="store_true", help="Apply data enrichments")
     parser.add_argument(
         "--refresh",
         action="store_true",
-        help="Delete existing rows for this city source before loading",
+        help="Delete existing rows for each city source before loading",
     )
     parser.add_argument(
         "--batch-size",
         type=int,
         default=DEFAULT_BATCH_SIZE,
-        help="Rows per batched INSERT for large imports (default: 1000)",
+        help="Rows encoded per COPY buffer for large imports (default: 10000)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for multi-city runs (default: one per city; 1 disables).",
+    )
+    parser.add_argument(
+        "--rebuild-indexes",
+        action="store_true",
+        help=(
+            "Drop secondary street_trees indexes before loading and rebuild them "
+            "afterwards (nearest-tree queries run unindexed meanwhile)"
+        ),
+    )
+    parser.add_argument(
+        "--cluster",
+        action="store_true",
+        help=(
+            "Rewrite street_trees in geography index order after loading "
+            "(locks the table while it runs)"
+        ),
     )
 
     args = parser.parse_args()
-    city = args.city
-    filename = args.file
-    if not filename:
-        filename = str(latest_archived_dataset(city))
-        print(f"Resolved latest archived dataset: {filename}")
-
-    apply_enrichments = args.enrich
-    refresh_mode = args.refresh
-    batch_size = max(1, args.batch_size)
+    cities = list(dict.fromkeys(args.cities))
+    if args.file and len(cities) > 1:
+        parser.error("--file can only be used with a single city")
 
-    city_config = CITY_HANDLERS[city]
-    source_name = city_config["source_name"]
-    source_file = str(Path(filename).resolve())
-    started_at = datetime.now(timezone.utc)
+    if args.file:
+        filenames = [args.file]
+    else:
+        filenames = []
+        for city in cities:
+            filename = str(latest_archived_dataset(city))
+            print(f"Resolved latest archived dataset: {filename}")
+            filenames.append(filename)
 
     conn = connect_db()
     try:
-        cursor = conn.cursor()
-        ensure_import_runs_table(cursor)
-        ensure_species_tables(cursor)
-        ensure_species_enrichment_tables(cursor)
-        seed_species_catalog(cursor)
-        ensure_street_tree_species_columns(cursor)
-
-        print(f"Loading data for {city}...")
-        if refresh_mode:
-            print(f"Refreshing existing rows for {source_name}...")
-            delete_city_rows(cursor, source_name)
-
-        load_city_data(cursor, city, city_config, filename, batch_size)
-        resolved_count = apply_species_catalog_to_source(cursor, source_name)
-        print(f"Applied species catalog to {resolved_count} {city} rows.")
+        # Schema upgrades and seeding run once here so workers never race on DDL.
+        try:
+            with import_session(conn) as cursor:
+                prepare_schema(cursor)
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            started_at = datetime.now(timezone.utc)
+            for city, filename in zip(cities, filenames):
+                try:
+                    log_failed_import(
+                        conn, city, CITY_HANDLERS[city], filename, args.refresh, started_at, str(e)
+                    )
+                except Exception as log_error:
+                    print(f"Failed to write import_runs failure entry: {log_error}")
+            return
 
-        if apply_enrichments:
-            print(f"Applying enrichments for {city}...")
-            enrich_data(cursor, city_config)
+        index_definitions = []
+        if args.rebuild_indexes:
+            with import_session(conn) as cursor:
+                index_definitions = drop_street_tree_indexes(cursor)
+        try:
+            results = import_cities(
+                cities,
+                filenames,
+                refresh_mode=args.refresh,
+                apply_enrichments=args.enrich,
+                batch_size=max(1, args.batch_size),
+                workers=args.workers,
+            )
+        finally:
+            if index_definitions:
+                # Rebuild even when an import failed so the API never stays unindexed.
+                print("Rebuilding street_trees indexes...")
+                with import_session(conn) as cursor:
+                    cursor.execute("SET LOCAL maintenance_work_mem = '1GB';")
+                    recreate_street_tree_indexes(cursor, index_definitions)
+        if not any(results):
+            return
 
-        row_count = count_city_rows(cursor, source_name)
-        record_import_run(
-            cursor,
-            city=city,
-            source_name=source_name,
-            source_file=source_file,
-            refresh_mode=refresh_mode,
-            row_count=row_count,
-            status="completed",
-            error_message=None,
-            started_at=started_at,
-            finished_at=datetime.now(timezone.utc),
-        )
-        conn.commit()
         # Refresh table stats after bulk writes so nearest-neighbor plans stay fast.
         try:
             analyze_cursor = conn.cursor()
+            if args.cluster:
+                print("Clustering street_trees by geography...")
+                cluster_street_trees(analyze_cursor)
+                conn.commit()
             analyze_cursor.execute("ANALYZE street_trees;")
             analyze_cursor.close()
+            conn.commit()
         except Exception as analyze_error:
-            print(f"ANALYZE failed (data import still committed): {analyze_error}")
+            print(f"Post-load maintenance failed (data import still committed): {analyze_error}")
 
-        print("Data import and enrichment completed successfully.")
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        conn.rollback()
-        try:
-            log_failed_import(city, city_config, filename, refresh_mode, started_at, str(e))
-        except Exception as log_error:
-            print(f"Failed to write import_runs failure entry: {log_error}")
+        if all(results):
+            print("Data import and enrichment completed successfully.")
     finally:
         conn.close()
 